@@ -1,18 +1,16 @@
+from utils.startup import enable_import_profile, log_import_profile
+
+enable_import_profile()
+
 import streamlit as st
 from streamlit_option_menu import option_menu
 from streamlit_supabase_auth import login_form, logout_button
-from supabase import Client, create_client
 
-from components.pdf_extractor import display_app_content
-from components.pricing import packages
 from utils.session import get_user_details
 
 SUPABASE_URL = st.secrets["SUPABASE_URL"]
 SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
 
-# Initialize the Supabase client only once and store it in session state
-if "supabase" not in st.session_state:
-    st.session_state.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 st.set_page_config(
     layout="wide",
     page_title="Home",
@@ -29,6 +27,8 @@ def main():
         st.error(f"⚠️ Authentication failed: {e}")
         st.stop()
 
+    log_import_profile()
+
     # If no session, show a login prompt
     if not session:
         st.info("Please log in with your Google account to continue.")
@@ -55,9 +55,14 @@ def main():
             orientation="horizontal",
             default_index=0,
         )
+        # Heavy dependencies (fitz, PIL, supabase, ...) load only once needed
         if selection == "HOME":
+            from components.pdf_extractor import display_app_content
+
             display_app_content()
         if selection == "PRICING":
+            from components.pricing import packages
+
             packages()
 
 
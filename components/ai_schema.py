@@ -0,0 +1,61 @@
+# components/ai_schema.py
+import json
+
+MODEL = "gpt-3.5-turbo"
+MAX_TOKENS = 1000
+# Bump whenever the tool schema or system prompt changes so cached answers are dropped.
+TOOL_SCHEMA_VERSION = "1"
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "structure_pdf_content",
+            "description": "Convert unstructured text into structured JSON format",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string", "description": "Document title"},
+                    "sections": {
+                        "type": "array",
+                        "items": {"type": "string", "description": "Section headings"},
+                    },
+                    "Skills": {
+                        "type": "array",
+                        "items": {"type": "string", "description": "Key points"},
+                    },
+                    "experience": {
+                        "type": "array",
+                        "items": {"type": "string", "description": "Keywords"},
+                    },
+                    "summary": {"type": "string", "description": "Brief summary"},
+                },
+                "required": ["title", "sections", "key_points", "keywords", "summary"],
+            },
+        },
+    }
+]
+
+SYSTEM_PROMPT = """Convert unstructured text into structured JSON with:
+                - title
+                - sections (array)
+                - skills (array)
+                - experience (array)
+                - summary"""
+
+
+def build_messages(extracted_text):
+    """Chat messages asking the model to structure extracted_text."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": extracted_text},
+    ]
+
+
+def parse_tool_response(response):
+    """Structured data from a chat completion, or {"error": ...}."""
+    if response and response.choices and response.choices[0].message.tool_calls:
+        structured_data = response.choices[0].message.tool_calls[0].function.arguments
+        return json.loads(structured_data)
+    else:
+        return {"error": f"Invalid response structure: {response}"}
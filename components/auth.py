@@ -1,18 +1,13 @@
 import urllib.parse
 
 import streamlit as st
-from supabase import Client, create_client
 
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
-OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
-
-# Initialize Supabase and OpenAI clients
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from components.database import get_supabase
 
 
 def sign_in_with_google():
     try:
+        supabase = get_supabase()
         redirect_url = "http://localhost:8501/?page=oauth_callback"
 
         response = supabase.auth.sign_in_with_oauth(
@@ -29,6 +24,7 @@ def sign_in_with_google():
 
 def handle_oauth_callback(query_params):
     try:
+        supabase = get_supabase()
         session = supabase.auth.get_session()
 
         if session and session.user:
@@ -45,6 +41,7 @@ def handle_oauth_callback(query_params):
 
 def register_user(email: str, password: str, firstname: str, lastname: str):
     try:
+        supabase = get_supabase()
         response = supabase.auth.sign_up(
             {
                 "email": email,
@@ -64,6 +61,7 @@ def register_user(email: str, password: str, firstname: str, lastname: str):
 
 def login_user(email: str, password: str):
     try:
+        supabase = get_supabase()
         auth_response = supabase.auth.sign_in_with_password(
             {"email": email, "password": password}
         )
@@ -0,0 +1,141 @@
+# components/batch.py
+import functools
+import io
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+
+import streamlit as st
+
+from components.database import insert_pdf_records
+from components.extraction import extract_document, iter_bounded, join_pages
+from components.text_cache import document_hash, load_text_by_page, store_text_by_page
+
+# Files held in the extraction pool at once; bounds the memory spent on queued PDFs.
+BATCH_MAX_IN_FLIGHT = 8
+
+
+def process_batch(uploaded_files, executor, on_progress=None):
+    """Extract every uploaded file through the pool. Returns {upload index: result}
+    in upload order, where result holds the file "name" and either "text_by_page" or
+    "error". Uploads are keyed by index because file names need not be unique."""
+    results = {}
+    jobs = []
+    for index, uploaded_file in enumerate(uploaded_files):
+        pdf_bytes = uploaded_file.getvalue()
+        pdf_hash = document_hash(pdf_bytes)
+        cached_pages = load_text_by_page(pdf_hash)
+        if cached_pages is not None:
+            results[index] = {"name": uploaded_file.name, "text_by_page": cached_pages}
+        else:
+            jobs.append(((index, uploaded_file.name, pdf_hash), (pdf_bytes,)))
+    if on_progress:
+        on_progress(len(results), len(uploaded_files))
+
+    def finish(index, name, pdf_hash, result):
+        try:
+            text_by_page = result()
+        except Exception as e:
+            results[index] = {"name": name, "error": str(e)}
+        else:
+            store_text_by_page(pdf_hash, text_by_page)
+            results[index] = {"name": name, "text_by_page": text_by_page}
+        if on_progress:
+            on_progress(len(results), len(uploaded_files))
+
+    pending = dict(jobs)
+    try:
+        for key, future in iter_bounded(
+            executor, extract_document, jobs, BATCH_MAX_IN_FLIGHT
+        ):
+            if isinstance(future.exception(), BrokenProcessPool):
+                raise future.exception()
+            finish(*key, future.result)
+            del pending[key]
+    except BrokenProcessPool:
+        # A worker died and the pool takes no more work; extract the rest here
+        for key, args in pending.items():
+            finish(*key, functools.partial(extract_document, *args))
+    return dict(sorted(results.items()))
+
+
+def build_batch_zip(results):
+    """Zip the extracted text of every successful file, one TXT per PDF.
+
+    Uploads sharing a name get numbered entries ("report (2).txt") instead of
+    overwriting each other.
+    """
+    buffer = io.BytesIO()
+    used = set()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for result in results.values():
+            if "text_by_page" not in result:
+                continue
+            stem = result["name"].rsplit(".", 1)[0]
+            entry = f"{stem}.txt"
+            copy = 1
+            while entry in used:
+                copy += 1
+                entry = f"{stem} ({copy}).txt"
+            used.add(entry)
+            archive.writestr(entry, join_pages(result["text_by_page"]))
+    return buffer.getvalue()
+
+
+def display_batch_content(user_id, uploads_remaining, executor):
+    """Batch mode: extract many PDFs at once and record them in one insert."""
+    uploaded_files = st.file_uploader(
+        "📤 Upload PDF Documents", type="pdf", accept_multiple_files=True
+    )
+    if not uploaded_files:
+        st.info("Please upload one or more PDF files to extract text.")
+        st.stop()
+
+    # Quota is checked once for the whole batch
+    accepted = uploaded_files[: max(uploads_remaining, 0)]
+    rejected = uploaded_files[len(accepted) :]
+    if rejected:
+        st.warning(
+            f"⚠️ Only {len(accepted)} of {len(uploaded_files)} files fit in your "
+            "remaining uploads. Please upgrade your plan to process the rest."
+        )
+
+    batch_key = tuple(uploaded_file.file_id for uploaded_file in accepted)
+    if st.session_state.get("batch_key") != batch_key:
+        progress = st.progress(0.0, text="Processing batch...")
+
+        def on_progress(done, total):
+            progress.progress(done / total, text=f"Processed {done}/{total} files")
+
+        results = process_batch(accepted, executor, on_progress)
+        # Only successful extractions are recorded (and count against the quota)
+        insert_pdf_records(
+            [
+                (result["name"], "processed")
+                for result in results.values()
+                if "text_by_page" in result
+            ],
+            user_id,
+        )
+        st.session_state.batch_key = batch_key
+        st.session_state.batch_results = results
+        # Zipped once per batch, not on every rerun
+        st.session_state.batch_zip = build_batch_zip(results)
+
+    results = st.session_state.batch_results
+    st.dataframe(
+        [
+            {
+                "File": result["name"],
+                "Pages": len(result.get("text_by_page", {})),
+                "Status": result.get("error", "processed"),
+            }
+            for result in results.values()
+        ],
+        use_container_width=True,
+    )
+    st.download_button(
+        "⬇️ Download all as TXT (zip)",
+        data=st.session_state.batch_zip,
+        file_name="extracted_text.zip",
+        mime="application/zip",
+    )
@@ -1,63 +1,205 @@
 # components/database.py
-from datetime import datetime, timedelta
+import functools
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 
 import streamlit as st
-from supabase import Client, create_client
+from supabase import Client, ClientOptions, create_client
 
-# Initialize the Supabase client
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_KEY"]
+from components.disk_cache import CACHE_DIR
+from components.record_writer import RecordWriter
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Upper bound on sockets the shared client keeps open to Supabase
+SUPABASE_MAX_CONNECTIONS = 20
 
+# Upload limits apply per billing period
+BILLING_PERIOD = timedelta(days=30)
 
-# Function to get the Supabase client from session state
-def get_supabase():
-    """Get the Supabase client from session state"""
-    return st.session_state.get("supabase")
+# Subscription and usage lookups are reused for this long across reruns and pages.
+# Writes through this module invalidate them immediately.
+ENTITLEMENT_TTL_SECONDS = 30
+
+_entitlement_cache = {}
+_entitlement_lock = threading.Lock()
+
+
+def _get_cached_entitlement(kind, user_id):
+    with _entitlement_lock:
+        entry = _entitlement_cache.get((kind, user_id))
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return entry[1]
+
+
+def _set_cached_entitlement(kind, user_id, value):
+    with _entitlement_lock:
+        _entitlement_cache[(kind, user_id)] = (
+            time.monotonic() + ENTITLEMENT_TTL_SECONDS,
+            value,
+        )
+
+
+# Function to drop a user's cached subscription and usage
+def invalidate_user_entitlements(user_id):
+    """Forget cached subscription and upload count for a user"""
+    with _entitlement_lock:
+        _entitlement_cache.pop(("subscription", user_id), None)
+        _entitlement_cache.pop(("upload_count", user_id), None)
+
+
+# Function to get the shared Supabase client
+@st.cache_resource
+def get_supabase() -> Client:
+    """Get the process-wide Supabase client, created on first use and shared by all sessions"""
+    import httpx  # loaded with the client, not when this module is imported
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_MAX_CONNECTIONS,
+        ),
+    )
+    try:
+        options = ClientOptions(httpx_client=http_client)
+    except TypeError:
+        # supabase releases before httpx_client support pool internally per client
+        http_client.close()
+        options = ClientOptions()
+    return create_client(
+        st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"], options
+    )
+
+
+# Function to send a batch of queued PDF records in one insert
+def _insert_pdf_record_batch(supabase, rows):
+    """Multi-row insert used by the record writer's background thread"""
+    supabase.table("pdf_records").insert(rows).execute()
+    for user_id in {row["user_id"] for row in rows}:
+        invalidate_user_entitlements(user_id)
+
+
+# SQLSTATE classes of errors that say nothing about the rows: connection
+# failures, rolled back transactions, insufficient resources, shutdowns
+TRANSIENT_SQLSTATE_CLASSES = ("08", "40", "53", "57")
+
+
+# Function to tell rejected rows from a database that is down or busy
+def _is_permanent_insert_error(error):
+    """Whether an insert failed because of the rows (constraint, RLS, bad value)"""
+    from postgrest.exceptions import APIError
+
+    if not isinstance(error, APIError):
+        return False  # network errors and timeouts
+    code = str(error.code or "")
+    if code.isdigit() and len(code) == 3:
+        # HTTP status of a response that was not a PostgREST error
+        return code.startswith("4") and code not in ("408", "429")
+    if code.startswith("PGRST"):
+        # PGRST0xx: no connection to the database; PGRST3xx: JWT problems
+        return not code.startswith(("PGRST0", "PGRST3"))
+    return bool(code) and code[:2] not in TRANSIENT_SQLSTATE_CLASSES
+
+
+# Function to get the write-behind queue for PDF records
+@st.cache_resource
+def get_record_writer():
+    """Queue that batches pdf_records inserts on a background thread"""
+    return RecordWriter(
+        # Bind the client here: the writer thread runs outside any script run
+        functools.partial(_insert_pdf_record_batch, get_supabase()),
+        os.path.join(CACHE_DIR, "pending_pdf_records.jsonl"),
+        is_permanent=_is_permanent_insert_error,
+    )
 
 
 # Function to insert a PDF record with user_id to track ownership
 def insert_pdf_record(filename, status, user_id):
-    """Insert a record with user_id to track ownership"""
-    supabase = get_supabase()
+    """Queue a record with user_id to track ownership; it is written in the background"""
+    return insert_pdf_records([(filename, status)], user_id)
+
+
+# Function to insert many PDF records
+def insert_pdf_records(records, user_id):
+    """Queue (filename, status) records for one user; they are sent in batched inserts"""
     user_info = st.session_state.get("user_info")
     user_id = user_info.get("id")
-    if not supabase:
-        st.error("Supabase client not initialized.")
-        return None
+    if not records:
+        return []
 
-    data = {
-        "filename": filename,
-        "status": status,
-        "user_id": user_id,
-        "created_at": datetime.now().isoformat(),
-    }
+    # UTC, like the billing period it is counted against
+    created_at = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    data = [
+        {
+            "filename": filename,
+            "status": status,
+            "user_id": user_id,
+            "created_at": created_at,
+        }
+        for filename, status in records
+    ]
 
-    response = supabase.table("pdf_records").insert(data).execute()
-    return response.data
+    get_record_writer().put(data)
+    return data
+
+
+# Columns shown in the upload history table
+HISTORY_COLUMNS = "id, filename, status, created_at"
 
 
-# Function to fetch only the current user's PDF records
-def fetch_pdf_records(user_id):
-    """Fetch only the current user's PDF records"""
+# Function to fetch one page of the current user's PDF records
+def fetch_pdf_records_page(
+    user_id, cursor=None, limit=50, filename=None, start_date=None, end_date=None
+):
+    """Fetch up to `limit` of the current user's records, newest first.
+
+    Keyset pagination: pass the returned cursor to get the next page. Returns
+    (rows, cursor), where cursor is None when there are no more rows.
+    """
     supabase = get_supabase()
     user_info = st.session_state.get("user_info")
 
     if not user_info or not supabase:
         st.warning("User info or Supabase client missing.")
-        return []
+        return [], None
 
     user_id = user_info.get("id")
+    query = supabase.table("pdf_records").select(HISTORY_COLUMNS).eq("user_id", user_id)
+    if filename:
+        query = query.ilike("filename", f"%{filename}%")
+    if start_date:
+        query = query.gte("created_at", start_date.isoformat())
+    if end_date:
+        query = query.lt("created_at", (end_date + timedelta(days=1)).isoformat())
+    if cursor:
+        created_at, record_id = cursor
+        # Rows strictly after the cursor in (created_at, id) descending order
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt.{record_id})'
+        )
+
+    # Ask for one extra row to learn whether another page exists
     response = (
-        supabase.table("pdf_records").select("*").eq("user_id", user_id).execute()
+        query.order("created_at", desc=True)
+        .order("id", desc=True)
+        .limit(limit + 1)
+        .execute()
     )
-    return response.data
+    rows = response.data[:limit]
+    if len(response.data) <= limit:
+        return rows, None
+    return rows, (rows[-1]["created_at"], rows[-1]["id"])
 
 
 # Function to get the current user's subscription details
 def get_user_subscription(user_id):
     """Get the current user's subscription details"""
+    cached = _get_cached_entitlement("subscription", user_id)
+    if cached is not None:
+        return dict(cached)
+
     supabase = get_supabase()
     if not supabase:
         st.error("Supabase client not initialized.")
@@ -67,24 +209,77 @@ def get_user_subscription(user_id):
         supabase.table("subscriptions").select("*").eq("user_id", user_id).execute()
     )
     if response.data:
-        return response.data[0]
+        subscription = response.data[0]
     else:
         # Return free tier by default
-        return {"plan": "free", "upload_limit": 10, "valid_until": None}
+        subscription = {"plan": "free", "upload_limit": 10, "valid_until": None}
+    _set_cached_entitlement("subscription", user_id, subscription)
+    return dict(subscription)
+
+
+# Function to get the start of the user's current billing period
+def get_billing_period_start(subscription):
+    """Start of the current 30-day billing period.
+
+    Periods run from the subscription's last_reset; users without one (the
+    default free tier) are billed per calendar month. Returned as naive UTC.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    last_reset = (subscription or {}).get("last_reset")
+    if last_reset:
+        try:
+            # Naive timestamps are local time, as written by datetime.now()
+            start = (
+                datetime.fromisoformat(last_reset)
+                .astimezone(timezone.utc)
+                .replace(tzinfo=None)
+            )
+        except (ValueError, TypeError):
+            start = None
+        if start is not None:
+            if start <= now:
+                periods = (now - start) // BILLING_PERIOD
+                start += periods * BILLING_PERIOD
+            return start
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
 
 # Function to get the current user's upload count for the current billing period
-def get_user_upload_count(user_id):
-    """Get the current user's upload count for the current billing period"""
+def get_user_upload_count(user_id, subscription=None):
+    """Get the current user's upload count for the current billing period.
+
+    The count is computed by Supabase (count="exact", head=True), so no rows are
+    transferred however long the user's history is.
+    """
+    if subscription is None:
+        subscription = get_user_subscription(user_id)
+    period_start = get_billing_period_start(subscription).isoformat()
+    # Uploads still queued in the record writer count too
+    pending = len(
+        get_record_writer().pending(
+            lambda row: row["user_id"] == user_id and row["created_at"] >= period_start
+        )
+    )
+
+    cached = _get_cached_entitlement("upload_count", user_id)
+    if cached is not None:
+        return cached + pending
+
     supabase = get_supabase()
     if not supabase:
         st.error("Supabase client not initialized.")
         return 0
 
     response = (
-        supabase.table("pdf_records").select("*").eq("user_id", user_id).execute()
+        supabase.table("pdf_records")
+        .select("id", count="exact", head=True)
+        .eq("user_id", user_id)
+        .gte("created_at", period_start)
+        .execute()
     )
-    return len(response.data)
+    upload_count = response.count or 0
+    _set_cached_entitlement("upload_count", user_id, upload_count)
+    return upload_count + pending
 
 
 # Function to reset a user's upload count
@@ -101,6 +296,7 @@ def reset_user_uploads(user_id):
     response = (
         supabase.table("subscriptions").update(data).eq("user_id", user_id).execute()
     )
+    invalidate_user_entitlements(user_id)
     return response.data
 
 
@@ -151,6 +347,7 @@ def update_user_subscription(user_id, plan, upload_limit):
         }
         response = supabase.table("subscriptions").insert(data).execute()
 
+    invalidate_user_entitlements(user_id)
     return response.data
 
 
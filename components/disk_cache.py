@@ -0,0 +1,111 @@
+# components/disk_cache.py
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Root directory for every on-disk cache the app keeps.
+CACHE_DIR = os.environ.get(
+    "PDFX_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "pdf_text_extractor"),
+)
+
+
+class DiskCache:
+    """Size-bounded key/value store in SQLite with least-recently-used eviction.
+
+    Entries older than ttl seconds (if given) are treated as missing.
+
+    Safe to share between threads and processes: every operation opens its own
+    short-lived connection and SQLite serialises the writers.
+    """
+
+    def __init__(self, path, max_bytes, ttl=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    created_at REAL NOT NULL DEFAULT 0
+                )""")
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(entries)")]
+            if "created_at" not in columns:
+                # Caches written before TTL support
+                conn.execute(
+                    "ALTER TABLE entries ADD COLUMN created_at REAL NOT NULL DEFAULT 0"
+                )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        """Return the stored bytes for key, or None, and mark the entry as recently used."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and time.time() - row[1] > self.ttl:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+        return row[0]
+
+    def set(self, key, value):
+        """Store value (bytes) under key, evicting old entries to stay within max_bytes."""
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, value, size, last_access, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), len(value), now, now),
+            )
+            self._evict(conn)
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def total_bytes(self):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()[0]
+
+    def _evict(self, conn):
+        if self.ttl is not None:
+            conn.execute(
+                "DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,131 @@
+# components/document_pool.py
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class DocumentPool:
+    """Keeps parsed fitz documents open between Streamlit reruns.
+
+    Handles are leased exclusively (PyMuPDF documents must not be used from two
+    threads at once), so a document viewed by several sessions may have several
+    open handles. Idle handles are closed when they exceed the handle or memory
+    budget, or after `idle_seconds` without use; a background thread checks
+    every `sweep_interval` seconds so that happens even when nobody uses the pool.
+    """
+
+    def __init__(
+        self,
+        max_handles=32,
+        max_bytes=1024 * 1024 * 1024,
+        idle_seconds=600,
+        sweep_interval=60,
+    ):
+        self.max_handles = max_handles
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        # (key, id(doc)) -> (doc, size, released_at); oldest first
+        self._idle = OrderedDict()
+        # id(doc) -> (key, size) for handles currently leased out
+        self._leased = {}
+        self._closed = False
+        self._stop = threading.Event()
+        self._sweeper = threading.Thread(
+            target=self._sweep,
+            args=(sweep_interval,),
+            name="document-pool",
+            daemon=True,
+        )
+        self._sweeper.start()
+
+    def _sweep(self, interval):
+        while not self._stop.wait(interval):
+            self.evict_idle()
+
+    def acquire(self, key, open_document, size=0):
+        """Return an exclusive handle for key, opening one with open_document() if needed."""
+        with self._lock:
+            for idle_key in self._idle:
+                if idle_key[0] == key:
+                    doc, size, _ = self._idle.pop(idle_key)
+                    self._leased[id(doc)] = (key, size)
+                    return doc
+        doc = open_document()
+        with self._lock:
+            self._leased[id(doc)] = (key, size)
+            to_close = self._trim()
+        self._close_all(to_close)
+        return doc
+
+    def release(self, doc):
+        """Return a leased handle to the pool."""
+        with self._lock:
+            key, size = self._leased.pop(id(doc))
+            if self._closed:
+                to_close = [doc]
+            else:
+                self._idle[(key, id(doc))] = (doc, size, time.monotonic())
+                to_close = self._trim()
+        self._close_all(to_close)
+
+    @contextmanager
+    def lease(self, key, open_document, size=0):
+        doc = self.acquire(key, open_document, size)
+        try:
+            yield doc
+        finally:
+            self.release(doc)
+
+    def evict_idle(self):
+        """Close handles that have not been used for idle_seconds."""
+        with self._lock:
+            to_close = self._trim()
+        self._close_all(to_close)
+
+    def close(self):
+        """Close every idle handle; leased handles are closed when released."""
+        self._stop.set()
+        with self._lock:
+            self._closed = True
+            to_close = [doc for doc, _, _ in self._idle.values()]
+            self._idle.clear()
+        self._close_all(to_close)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "idle": len(self._idle),
+                "leased": len(self._leased),
+                "bytes": self._total_bytes(),
+            }
+
+    def _total_bytes(self):
+        return sum(size for _, size, _ in self._idle.values()) + sum(
+            size for _, size in self._leased.values()
+        )
+
+    def _trim(self):
+        """Pop idle handles over budget or past their idle time. Caller holds the lock."""
+        to_close = []
+        now = time.monotonic()
+        total_bytes = self._total_bytes()
+        while self._idle:
+            idle_key = next(iter(self._idle))
+            doc, size, released_at = self._idle[idle_key]
+            over_budget = (
+                len(self._idle) + len(self._leased) > self.max_handles
+                or total_bytes > self.max_bytes
+            )
+            if not over_budget and now - released_at < self.idle_seconds:
+                break
+            del self._idle[idle_key]
+            total_bytes -= size
+            to_close.append(doc)
+        return to_close
+
+    @staticmethod
+    def _close_all(docs):
+        for doc in docs:
+            doc.close()
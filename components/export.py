@@ -0,0 +1,74 @@
+# components/export.py
+import csv
+import gzip
+import io
+import json
+import tempfile
+
+# format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "txt": ("txt", "text/plain"),
+    "csv": ("csv", "text/csv"),
+    "jsonl": ("jsonl", "application/x-ndjson"),
+}
+
+# Exports up to this size stay in memory; larger ones roll over to a temp file
+EXPORT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+
+def write_pages(f, pages, fmt, source=None):
+    """Write (page_no, text) pairs to the text stream f, one page at a time.
+
+    txt matches join_pages(); csv has a Page/Text header; jsonl writes one
+    {"page", "text"} object per line (plus "file" when source is given).
+    """
+    if fmt == "txt":
+        for _, page_text in pages:
+            f.write(page_text)
+            f.write("\n\n")
+    elif fmt == "csv":
+        writer = csv.writer(f)
+        writer.writerow(["Page", "Text"])
+        for page, page_text in pages:
+            writer.writerow([f"Page {page}", page_text])
+    elif fmt == "jsonl":
+        for page, page_text in pages:
+            record = {"page": page, "text": page_text}
+            if source is not None:
+                record = {"file": source, **record}
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+
+def open_export(path, compress=False):
+    """Text stream for an export file, gzip-compressed if asked."""
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def export_pages(pages, fmt, compress=False, max_memory=EXPORT_SPOOL_MAX_BYTES):
+    """Export pages into a binary file object, rewound and ready to read.
+
+    Output is written page by page into a SpooledTemporaryFile, so memory use is
+    bounded by max_memory however large the document is.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    raw = gzip.GzipFile(fileobj=out, mode="wb", mtime=0) if compress else out
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    write_pages(text, pages, fmt)
+    text.flush()
+    # Let go of the wrapper without closing the spooled file underneath
+    text.detach()
+    if compress:
+        raw.close()
+    out.seek(0)
+    return out
+
+
+def read_export(export_file):
+    """Whole contents of an export file; for download_button's data callable."""
+    export_file.seek(0)
+    return export_file.read()
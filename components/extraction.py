@@ -0,0 +1,132 @@
+# components/extraction.py
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import fitz
+
+# Below this many pages the cost of starting jobs and having every worker open
+# its own copy of the document outweighs the speedup, so extraction stays on the
+# calling thread.
+PARALLEL_MIN_PAGES = 64
+
+
+def iter_text_from_pdf(doc, start_page=1):
+    """Yield (page_no, text) for each page as soon as it has been extracted."""
+    for i in range(start_page - 1, len(doc)):
+        yield i + 1, doc[i].get_text()
+
+
+def join_pages(text_by_page):
+    """Join page texts in page order into a single document string."""
+    return "".join(text_by_page[page] + "\n\n" for page in sorted(text_by_page))
+
+
+def create_extraction_pool(max_workers=None):
+    """Create a process pool for the page-range and whole-document workers."""
+    # Spawn rather than fork: the Streamlit server is multi-threaded and
+    # forking it can deadlock the children.
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def pool_is_broken(executor):
+    """Whether a process pool has lost a worker; a broken pool refuses all new work."""
+    return bool(getattr(executor, "_broken", False))
+
+
+def split_page_range(num_pages, parts):
+    """Split range(num_pages) into at most `parts` contiguous (start, stop) ranges."""
+    parts = max(1, min(parts, num_pages))
+    size, extra = divmod(num_pages, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def open_pdf(source):
+    """Open a PDF from a file path or from its bytes."""
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _extract_page_range(source, start, stop, with_words=False):
+    """Worker: open a private copy of the document and extract pages [start, stop).
+
+    source is a path (cheap to send to the worker) or the PDF bytes. Returns a
+    (text, words) pair per page; words is None unless with_words is set.
+    """
+    with open_pdf(source) as doc:
+        return [
+            (
+                doc[i].get_text(),
+                doc[i].get_text("words") if with_words else None,
+            )
+            for i in range(start, stop)
+        ]
+
+
+def submit_page_ranges(source, num_pages, executor, parts=None, with_words=False):
+    """Submit extraction jobs to the pool. Returns a list of (start, future) pairs whose
+    futures resolve to the (text, words) pairs of pages start+1, start+2, ..."""
+    ranges = split_page_range(num_pages, parts or os.cpu_count())
+    return [
+        (
+            start,
+            executor.submit(_extract_page_range, source, start, stop, with_words),
+        )
+        for start, stop in ranges
+    ]
+
+
+def collect_page_ranges(jobs, text_by_page, wait=True, search_index=None):
+    """Move finished job results into text_by_page (and search_index, if given).
+    Returns the jobs still running."""
+    pending = []
+    for start, future in jobs:
+        if not wait and not future.done():
+            pending.append((start, future))
+            continue
+        for offset, (page_text, words) in enumerate(future.result()):
+            text_by_page[start + offset + 1] = page_text
+            if search_index is not None and words is not None:
+                search_index.add_page(start + offset + 1, words)
+    return pending
+
+
+def extract_document(pdf_bytes):
+    """Worker: extract a whole document from its bytes. Returns text_by_page."""
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        return dict(iter_text_from_pdf(doc))
+
+
+def extract_file(path):
+    """Worker: extract a PDF on disk. Returns text_by_page."""
+    with fitz.open(path) as doc:
+        return dict(iter_text_from_pdf(doc))
+
+
+def iter_bounded(executor, fn, items, max_in_flight):
+    """Run fn(*args) for each (key, args) in items with at most max_in_flight jobs
+    queued on the executor. Yields (key, future) as jobs finish."""
+    items = iter(items)
+    in_flight = {}
+    while True:
+        while len(in_flight) < max_in_flight:
+            try:
+                key, args = next(items)
+            except StopIteration:
+                break
+            in_flight[executor.submit(fn, *args)] = key
+        if not in_flight:
+            return
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield in_flight.pop(future), future
@@ -0,0 +1,134 @@
+# components/layout_export.py
+import os
+
+from components.extraction import open_pdf
+
+# format -> (file extension, MIME type)
+LAYOUT_FORMATS = {
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+# Rows buffered before they are written out as one row group / record batch
+LAYOUT_ROW_GROUP_ROWS = 64 * 1024
+
+
+def layout_schema():
+    """One row per word: its position in the page/block/line/word hierarchy,
+    bounding box (PDF points) and the font of its first character."""
+    import pyarrow as pa  # optional dependency
+
+    return pa.schema(
+        [
+            ("page", pa.int32()),
+            ("block", pa.int32()),
+            ("line", pa.int32()),
+            ("word", pa.int32()),
+            ("text", pa.string()),
+            ("x0", pa.float32()),
+            ("y0", pa.float32()),
+            ("x1", pa.float32()),
+            ("y1", pa.float32()),
+            ("font", pa.string()),
+            ("size", pa.float32()),
+            ("flags", pa.int32()),
+        ]
+    )
+
+
+def _word_row(block_no, line_no, word_no, chars):
+    _, span = chars[0]
+    return (
+        block_no,
+        line_no,
+        word_no,
+        "".join(char["c"] for char, _ in chars),
+        min(char["bbox"][0] for char, _ in chars),
+        min(char["bbox"][1] for char, _ in chars),
+        max(char["bbox"][2] for char, _ in chars),
+        max(char["bbox"][3] for char, _ in chars),
+        span["font"],
+        span["size"],
+        span["flags"],
+    )
+
+
+def iter_page_words(page):
+    """Yield (block, line, word, text, x0, y0, x1, y1, font, size, flags) for one page.
+
+    Words are split on whitespace like get_text("words"), but built from
+    rawdict characters so every word carries the font of the span it is in.
+    """
+    for block in page.get_text("rawdict")["blocks"]:
+        if block["type"] != 0:
+            continue
+        for line_no, line in enumerate(block["lines"]):
+            word_no = 0
+            chars = []
+            for span in line["spans"]:
+                for char in span["chars"]:
+                    if not char["c"].isspace():
+                        chars.append((char, span))
+                    elif chars:
+                        yield _word_row(block["number"], line_no, word_no, chars)
+                        word_no += 1
+                        chars = []
+            if chars:
+                yield _word_row(block["number"], line_no, word_no, chars)
+
+
+def write_layout(
+    doc, sink, fmt="parquet", compression="zstd", row_group_rows=LAYOUT_ROW_GROUP_ROWS
+):
+    """Write the word rows of every page of doc to sink (a path or binary file).
+
+    Pages are read one at a time and flushed every row_group_rows rows, so memory
+    stays bounded however long the document is. Returns the number of rows.
+    """
+    import pyarrow as pa  # optional dependency
+
+    schema = layout_schema()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(sink, schema, compression=compression)
+    elif fmt == "arrow":
+        writer = pa.ipc.new_file(
+            sink, schema, options=pa.ipc.IpcWriteOptions(compression=compression)
+        )
+    else:
+        raise ValueError(f"Unknown layout format: {fmt}")
+
+    columns = {name: [] for name in schema.names}
+    rows = 0
+
+    def flush():
+        if columns["page"]:
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            for values in columns.values():
+                values.clear()
+
+    try:
+        for page in doc:
+            for row in iter_page_words(page):
+                columns["page"].append(page.number + 1)
+                for name, value in zip(schema.names[1:], row):
+                    columns[name].append(value)
+                rows += 1
+            if len(columns["page"]) >= row_group_rows:
+                flush()
+        flush()
+    finally:
+        writer.close()
+    return rows
+
+
+def export_layout_file(path, out_path, fmt="parquet"):
+    """Worker: write the layout of a PDF on disk to out_path. Returns its page count."""
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp_path = out_path + ".part"
+    with open_pdf(path) as doc:
+        write_layout(doc, tmp_path, fmt)
+        num_pages = len(doc)
+    os.replace(tmp_path, out_path)
+    return num_pages
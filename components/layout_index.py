@@ -0,0 +1,81 @@
+# components/layout_index.py
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# A word belongs to a selection when at least this share of its box is inside it.
+MIN_WORD_OVERLAP = 0.5
+
+
+class PageWordIndex:
+    """Word boxes of one page in NumPy arrays, for vectorized rectangle queries."""
+
+    def __init__(self, words):
+        # page.get_text("words") rows: x0, y0, x1, y1, word, block_no, line_no, word_no
+        self.words = [word[4] for word in words]
+        self.boxes = np.array([word[:4] for word in words], dtype=np.float32).reshape(
+            -1, 4
+        )
+        self.lines = np.array([word[5:7] for word in words], dtype=np.int32).reshape(
+            -1, 2
+        )
+        widths = self.boxes[:, 2] - self.boxes[:, 0]
+        heights = self.boxes[:, 3] - self.boxes[:, 1]
+        self.areas = np.maximum(widths * heights, 1e-6)
+
+    @classmethod
+    def from_page(cls, page):
+        return cls(page.get_text("words"))
+
+    def query(self, x0, y0, x1, y1):
+        """Indices of the words inside the rectangle, in reading order."""
+        if not len(self.words):
+            return np.empty(0, dtype=np.intp)
+        overlap_w = np.minimum(self.boxes[:, 2], x1) - np.maximum(self.boxes[:, 0], x0)
+        overlap_h = np.minimum(self.boxes[:, 3], y1) - np.maximum(self.boxes[:, 1], y0)
+        overlap = np.clip(overlap_w, 0, None) * np.clip(overlap_h, 0, None)
+        # get_text("words") is already in reading order, so the indices are too
+        return np.flatnonzero(overlap / self.areas >= MIN_WORD_OVERLAP)
+
+    def text_in(self, x0, y0, x1, y1):
+        """Selected words joined with spaces, one output line per text line."""
+        parts = []
+        previous_line = None
+        for i in self.query(x0, y0, x1, y1):
+            line = tuple(self.lines[i])
+            if previous_line is not None:
+                parts.append(" " if line == previous_line else "\n")
+            parts.append(self.words[i])
+            previous_line = line
+        return "".join(parts)
+
+
+class WordIndexCache:
+    """LRU of PageWordIndex objects keyed by (doc_key, page_index).
+
+    Entries remember the words list they were built from and are rebuilt when
+    a page gets new words, e.g. from OCR via add_page(..., replace=True).
+    """
+
+    def __init__(self, max_pages=512):
+        self.max_pages = max_pages
+        self._lock = threading.Lock()
+        self._pages = OrderedDict()
+
+    def get_or_build(self, doc_key, page, words=None):
+        """Index of one page, built from words (its get_text("words") rows, e.g.
+        from the search index) or, if they are not known yet, from the page."""
+        key = (doc_key, page.number)
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is not None and (words is None or entry[0] is words):
+                self._pages.move_to_end(key)
+                return entry[1]
+        index = PageWordIndex.from_page(page) if words is None else PageWordIndex(words)
+        with self._lock:
+            self._pages[key] = (words, index)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return index
@@ -0,0 +1,248 @@
+# components/lazy_extraction.py
+import threading
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from components.extraction import (
+    PARALLEL_MIN_PAGES,
+    collect_page_ranges,
+    open_pdf,
+    submit_page_ranges,
+)
+from components.ocr import find_ocr_pages, iter_ocr, ocr_available
+from components.search_index import SearchIndex
+from components.text_store import PageTextStore
+
+
+class LazyExtraction:
+    """Text and search index of one document, filled in by a background worker.
+
+    Pages somebody is looking at are extracted on demand with page_text(); the
+    worker completes the rest in page order (through the process pool for large
+    documents). Pages without a usable text layer are then OCR'd (see
+    components.ocr). As soon as every page has its text, OCR'd pages included,
+    it is packed into a PageTextStore (store) and the per-page dict dropped;
+    text_complete is set then, while the search index of the remaining pages is
+    still being built (complete, and ocr_progress for the OCR stage).
+    """
+
+    def __init__(
+        self,
+        source,
+        num_pages,
+        executor=None,
+        text_by_page=None,
+        on_complete=None,
+        compress=False,
+        words_by_page=None,
+    ):
+        self.source = source
+        self.num_pages = num_pages
+        self.executor = executor
+        self.search_index = SearchIndex()
+        self.store = None
+        self.error = None
+        # (pages done, pages to OCR) once scanned pages have been found
+        self.ocr_progress = None
+        # Scanned pages were found but no OCR engine is installed
+        self.ocr_missing = False
+        self._pages = dict(text_by_page or {})
+        # A cache entry with words (OCR'd pages included) is final and never opens
+        # the PDF. Cached text without words (e.g. from batch mode) was never
+        # checked for scanned pages, so it still goes through OCR and indexing.
+        self._has_text = len(self._pages) >= num_pages
+        self._from_cache = self._has_text and words_by_page is not None
+        self._cached_words = words_by_page or {}
+        self._on_complete = on_complete
+        self._compress = compress
+        self._lock = threading.Lock()
+        self._text_done = threading.Event()
+        self._done = threading.Event()
+        self._stopped = False
+        self._jobs = []
+        if self._from_cache:
+            self._finish_text()
+        self._thread = threading.Thread(
+            target=self._run, name="lazy-extraction", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def text_complete(self):
+        """Every page has its text and store holds it. Stays False if the worker
+        failed or was stopped before that; a partial store is never published."""
+        return self.store is not None
+
+    @property
+    def complete(self):
+        """Text and search index cover every page."""
+        return self._done.is_set()
+
+    @property
+    def pages_done(self):
+        with self._lock:
+            return self.num_pages if self.store is not None else len(self._pages)
+
+    def has_page(self, page_no):
+        with self._lock:
+            return self.store is not None or page_no in self._pages
+
+    def page_text(self, doc, page_no):
+        """Text of one page, extracted right away on the caller's handle if needed."""
+        with self._lock:
+            if self.store is not None:
+                return self.store[page_no]
+            page_text = self._pages.get(page_no)
+        if page_text is None:
+            page_text = doc[page_no - 1].get_text()
+            self._store_text(page_no, page_text)
+        return page_text
+
+    def snapshot(self):
+        """The pages extracted so far: the store once complete, else a dict copy."""
+        with self._lock:
+            if self.store is not None:
+                return self.store
+            return dict(self._pages)
+
+    def wait(self, timeout=None):
+        """Block until every page has text or the worker gave up. Returns
+        text_complete (False on timeout or failure)."""
+        self._text_done.wait(timeout)
+        return self.text_complete
+
+    def full_text(self):
+        if not self.wait():
+            raise RuntimeError("Text extraction did not complete") from self.error
+        return self.store.text()
+
+    def stop(self):
+        self._stopped = True
+        for _, future in self._jobs:
+            future.cancel()
+
+    def _store_text(self, page_no, page_text):
+        with self._lock:
+            if self.store is not None:
+                return
+            self._pages.setdefault(page_no, page_text)
+
+    def _finish_text(self):
+        # Caller holds the lock (or owns the object, in __init__)
+        self.store = PageTextStore.from_pages(
+            self._pages, self.num_pages, compress=self._compress
+        )
+        self._pages = None
+        self._text_done.set()
+
+    def _extract_with_pool(self):
+        self._jobs = submit_page_ranges(
+            self.source, self.num_pages, self.executor, with_words=True
+        )
+        starts = {future: start for start, future in self._jobs}
+        for future in as_completed(starts):
+            if self._stopped:
+                return
+            pages = {}
+            try:
+                collect_page_ranges(
+                    [(starts[future], future)], pages, search_index=self.search_index
+                )
+            except BrokenProcessPool:
+                raise
+            except Exception:
+                # This range failed in its worker; the sequential pass extracts it
+                continue
+            for page_no, page_text in pages.items():
+                self._store_text(page_no, page_text)
+
+    def _run_ocr(self, doc):
+        """Replace the text and index entries of scanned pages by OCR output."""
+        page_numbers = find_ocr_pages(doc, self.snapshot())
+        if not page_numbers:
+            return
+        if not ocr_available():
+            self.ocr_missing = True
+            return
+        remaining = list(page_numbers)
+        self.ocr_progress = (0, len(page_numbers))
+        try:
+            self._apply_ocr(doc, remaining, self.executor)
+        except BrokenProcessPool:
+            # Finish the pages the dead pool did not deliver on this thread
+            self._apply_ocr(doc, remaining, None)
+
+    def _apply_ocr(self, doc, remaining, executor):
+        total = self.ocr_progress[1]
+        results = iter_ocr(self.source, doc, list(remaining), executor)
+        for page_no, page_text, words in results:
+            if self._stopped:
+                results.close()
+                return
+            with self._lock:
+                self._pages[page_no] = page_text
+            self.search_index.add_page(page_no, words, replace=True)
+            remaining.remove(page_no)
+            self.ocr_progress = (total - len(remaining), total)
+
+    def _run(self):
+        try:
+            if (
+                self.executor is not None
+                and not self._has_text
+                and self.num_pages >= PARALLEL_MIN_PAGES
+            ):
+                try:
+                    self._extract_with_pool()
+                except BrokenProcessPool:
+                    # A worker died. The pass below extracts whatever is still
+                    # missing on this thread; the app replaces the pool on next use.
+                    pass
+                if self._stopped:
+                    return
+
+            for page_no, words in self._cached_words.items():
+                self.search_index.add_page(page_no, words)
+            self._cached_words = None
+
+            # Whatever the pool or the cache did not cover
+            if not self._from_cache or len(self.search_index) < self.num_pages:
+                with open_pdf(self.source) as doc:
+                    if not self._from_cache:
+                        # Text first: the store must not wait for word indexing
+                        for page_no in range(1, self.num_pages + 1):
+                            if self._stopped:
+                                return
+                            if not self.has_page(page_no):
+                                self._store_text(page_no, doc[page_no - 1].get_text())
+                        # Scanned pages only have their text once OCR'd
+                        self._run_ocr(doc)
+                        if self._stopped:
+                            return
+                        with self._lock:
+                            self._finish_text()
+
+                    # OCR'd pages are indexed already, from the OCR words
+                    for page_no in range(1, self.num_pages + 1):
+                        if self._stopped:
+                            return
+                        if not self.search_index.is_indexed(page_no):
+                            self.search_index.add_page(
+                                page_no, doc[page_no - 1].get_text("words")
+                            )
+
+            # Without OCR, scanned pages are empty; don't cache that
+            if (
+                self._on_complete is not None
+                and not self._from_cache
+                and not self.ocr_missing
+            ):
+                # The words, OCR'd ones included, let a cache hit skip the PDF
+                self._on_complete(self.snapshot(), self.search_index.words_by_page())
+        except Exception as e:
+            self.error = e
+        finally:
+            # Unblock waiters even if the worker failed or was stopped. Pages may
+            # be missing then, so no store is built and text_complete stays False.
+            self._text_done.set()
+            self._done.set()
@@ -0,0 +1,138 @@
+# components/ocr.py
+import functools
+import os
+import shutil
+from concurrent.futures import as_completed
+
+import fitz
+
+from components.extraction import iter_text_from_pdf, open_pdf
+
+# A page with fewer non-whitespace characters than this has no usable text layer
+OCR_MIN_TEXT_CHARS = 16
+# ...provided images cover at least this share of it (blank pages are left alone)
+OCR_MIN_IMAGE_COVERAGE = 0.3
+OCR_DPI = int(os.environ.get("PDFX_OCR_DPI", "300"))
+OCR_LANG = os.environ.get("PDFX_OCR_LANG", "eng")
+
+
+@functools.lru_cache(maxsize=None)
+def ocr_available():
+    """Whether pytesseract and the tesseract binary are installed."""
+    try:
+        import pytesseract  # optional dependency
+    except ImportError:
+        return False
+    return shutil.which(pytesseract.pytesseract.tesseract_cmd) is not None
+
+
+def needs_ocr(page, page_text):
+    """Fast check for a page whose text layer is missing or unusable.
+
+    Only pages with (almost) no extractable text are inspected further, and then
+    only their image placements are looked at, never the pixels.
+    """
+    usable = sum(1 for c in page_text if not c.isspace() and c != "\ufffd")
+    if usable >= OCR_MIN_TEXT_CHARS:
+        return False
+    page_area = abs(page.rect)
+    if not page_area:
+        return False
+    image_area = sum(
+        abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info()
+    )
+    return image_area / page_area >= OCR_MIN_IMAGE_COVERAGE
+
+
+def find_ocr_pages(doc, text_by_page):
+    """Page numbers (1-based) of doc that should go through OCR."""
+    return [
+        page_no
+        for page_no, page_text in sorted(text_by_page.items())
+        if needs_ocr(doc[page_no - 1], page_text)
+    ]
+
+
+def _ocr_page(page, dpi=OCR_DPI, lang=OCR_LANG):
+    """OCR one page. Returns (text, words) with words shaped like get_text("words")."""
+    import pytesseract  # optional dependency
+    from PIL import Image
+
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    data = pytesseract.image_to_data(
+        image, lang=lang, output_type=pytesseract.Output.DICT
+    )
+
+    # Pixel coordinates back to PDF points
+    scale = 72 / dpi
+    words = []
+    lines = []  # ((block, paragraph, line), words of the line)
+    for i, word in enumerate(data["text"]):
+        word = word.strip()
+        if not word:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        if not lines or lines[-1][0] != key:
+            lines.append((key, []))
+        line_words = lines[-1][1]
+        x0 = data["left"][i] * scale
+        y0 = data["top"][i] * scale
+        x1 = (data["left"][i] + data["width"][i]) * scale
+        y1 = (data["top"][i] + data["height"][i]) * scale
+        words.append((x0, y0, x1, y1, word, key[0], key[2], len(line_words)))
+        line_words.append(word)
+
+    # One line of text per OCR line, blocks separated by a blank line
+    parts = []
+    previous_block = None
+    for (block, _, _), line_words in lines:
+        if previous_block is not None and block != previous_block:
+            parts.append("")
+        parts.append(" ".join(line_words))
+        previous_block = block
+    return "".join(part + "\n" for part in parts), words
+
+
+def _ocr_page_numbers(source, page_numbers, dpi=OCR_DPI, lang=OCR_LANG):
+    """Worker: rasterize and OCR the given pages of a PDF. Returns {page_no: (text, words)}."""
+    with open_pdf(source) as doc:
+        return {
+            page_no: _ocr_page(doc[page_no - 1], dpi, lang) for page_no in page_numbers
+        }
+
+
+def iter_ocr(source, doc, page_numbers, executor=None, dpi=OCR_DPI, lang=OCR_LANG):
+    """OCR the given pages, yielding (page_no, text, words) as each one finishes.
+
+    With an executor every page is its own job (each takes seconds, so they
+    balance well) and workers open their own copy of source; without one the
+    pages are OCR'd on the calling thread from doc.
+    """
+    if executor is None:
+        for page_no in page_numbers:
+            yield (page_no, *_ocr_page(doc[page_no - 1], dpi, lang))
+        return
+    futures = [
+        executor.submit(_ocr_page_numbers, source, [page_no], dpi, lang)
+        for page_no in page_numbers
+    ]
+    try:
+        for future in as_completed(futures):
+            for page_no, (page_text, words) in future.result().items():
+                yield page_no, page_text, words
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def extract_file_with_ocr(path):
+    """Worker: extract a PDF on disk, OCR'ing pages without a text layer.
+    Returns text_by_page."""
+    with open_pdf(path) as doc:
+        text_by_page = dict(iter_text_from_pdf(doc))
+        page_numbers = find_ocr_pages(doc, text_by_page)
+        if page_numbers and ocr_available():
+            for page_no, page_text, _ in iter_ocr(path, doc, page_numbers):
+                text_by_page[page_no] = page_text
+    return text_by_page
@@ -0,0 +1,185 @@
+# components/openai_async.py
+"""Async request layer for batch and chunked structuring workloads.
+
+One AsyncStructurer holds a pooled HTTP client; requests are bounded by a
+concurrency semaphore and a token-bucket rate limit, and transient failures
+(429, 5xx, timeouts, dropped connections) are retried with jittered
+exponential backoff.
+
+Benchmark against the local stand-in server (openai_stub_server.py):
+
+    python openai_stub_server.py --latency 0.5 --error-rate 0.1 &
+    python -m components.openai_async --base-url http://127.0.0.1:8765/v1 --requests 200
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from components.ai_schema import (
+    MAX_TOKENS,
+    MODEL,
+    TOOLS,
+    build_messages,
+    parse_tool_response,
+)
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class AsyncStructurer:
+    """Structures texts concurrently with the same schema and result as json_data.
+
+    Use as an async context manager so the pooled connections are closed.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        base_url=None,
+        max_concurrency=8,
+        requests_per_second=10,
+        max_retries=5,
+        timeout=60,
+    ):
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+            timeout=timeout,
+        )
+        # Retries are handled here, with jitter, not by the SDK
+        self.client = AsyncOpenAI(
+            api_key=api_key, base_url=base_url, http_client=self._http, max_retries=0
+        )
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(requests_per_second)
+        self.retries = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.client.close()
+
+    async def structure(self, extracted_text):
+        """Structure one text. Returns the parsed tool arguments or {"error": ...}."""
+        attempt = 0
+        while True:
+            await self._bucket.acquire()
+            try:
+                async with self._semaphore:
+                    response = await self.client.chat.completions.create(
+                        model=MODEL,
+                        messages=build_messages(extracted_text),
+                        tools=TOOLS,
+                        max_tokens=MAX_TOKENS,
+                        tool_choice="auto",
+                    )
+                return parse_tool_response(response)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    return {"error": str(e)}
+                delay = backoff_delay(attempt)
+                retry_after = getattr(getattr(e, "response", None), "headers", {}).get(
+                    "retry-after"
+                )
+                if retry_after:
+                    try:
+                        delay = max(delay, float(retry_after))
+                    except ValueError:
+                        pass
+                attempt += 1
+                self.retries += 1
+                await asyncio.sleep(delay)
+            except Exception as e:
+                return {"error": str(e)}
+
+    async def structure_many(self, texts):
+        """Structure several texts concurrently; results are in input order."""
+        return await asyncio.gather(*(self.structure(text) for text in texts))
+
+
+def structure_texts(texts, api_key, **options):
+    """Blocking wrapper around AsyncStructurer.structure_many for sync callers."""
+
+    async def run():
+        async with AsyncStructurer(api_key, **options) as structurer:
+            return await structurer.structure_many(texts)
+
+    return asyncio.run(run())
+
+
+async def _benchmark(args):
+    texts = [f"Document {i}\n" + "lorem ipsum " * 200 for i in range(args.requests)]
+    async with AsyncStructurer(
+        args.api_key,
+        base_url=args.base_url,
+        max_concurrency=args.concurrency,
+        requests_per_second=args.rate,
+        max_retries=args.retries,
+    ) as structurer:
+        started = time.monotonic()
+        results = await structurer.structure_many(texts)
+        elapsed = time.monotonic() - started
+    errors = sum("error" in result for result in results)
+    print(
+        f"{len(results)} requests in {elapsed:.2f}s "
+        f"({len(results) / elapsed:.1f} req/s), "
+        f"{errors} failed, {structurer.retries} retries"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the async request layer.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8765/v1")
+    parser.add_argument("--api-key", default="stub")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=50)
+    parser.add_argument("--retries", type=int, default=5)
+    asyncio.run(_benchmark(parser.parse_args()))
@@ -1,59 +1,175 @@
 from openai import OpenAI
 import streamlit as st
+import functools
+import hashlib
 import json
+import os
+import sqlite3
+
+from components.ai_schema import (
+    MAX_TOKENS,
+    MODEL,
+    TOOL_SCHEMA_VERSION,
+    TOOLS,
+    build_messages,
+    parse_tool_response,
+)
+from components.disk_cache import CACHE_DIR, DiskCache
+
+
+@functools.lru_cache(maxsize=None)
+def get_client():
+    """OpenAI client, created on first use"""
+    return OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+
+
+# Rough budget per request: gpt-3.5-turbo has a 16k context and we reserve room
+# for the prompt, tool schema and the 1000-token answer.
+CHUNK_TOKEN_BUDGET = 12000
+CHARS_PER_TOKEN = 4
+MAX_CONCURRENT_REQUESTS = 4
+
+AI_CACHE_MAX_BYTES = int(os.environ.get("PDFX_AI_CACHE_MB", "64")) * 1024 * 1024
+AI_CACHE_TTL_SECONDS = float(os.environ.get("PDFX_AI_CACHE_TTL_DAYS", "30")) * 86400
+
+
+@functools.lru_cache(maxsize=None)
+def get_ai_cache():
+    """Process-wide cache of structured AI responses, created on first use."""
+    return DiskCache(
+        os.path.join(CACHE_DIR, "ai_cache.sqlite3"),
+        AI_CACHE_MAX_BYTES,
+        ttl=AI_CACHE_TTL_SECONDS,
+    )
+
+
+def _ai_cache_key(extracted_text):
+    text_hash = hashlib.sha256(extracted_text.encode("utf-8")).hexdigest()
+    return f"{text_hash}:{MODEL}:{TOOL_SCHEMA_VERSION}"
+
+
+def _load_cached(cache_key):
+    try:
+        cached = get_ai_cache().get(cache_key)
+    except sqlite3.Error:
+        return None
+    return json.loads(cached) if cached is not None else None
+
+
+def _store_cached(cache_key, result):
+    if "error" in result:
+        return
+    try:
+        get_ai_cache().set(cache_key, json.dumps(result).encode("utf-8"))
+    except sqlite3.Error:
+        pass
 
-OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
-client = OpenAI(api_key=OPENAI_API_KEY)
 
 def json_data(extracted_text: str):
+    cache_key = _ai_cache_key(extracted_text)
+    cached = _load_cached(cache_key)
+    if cached is not None:
+        return cached
+
+    result = _structure_text(extracted_text)
+    _store_cached(cache_key, result)
+    return result
+
+
+def _structure_text(extracted_text: str):
     try:
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "structure_pdf_content",
-                    "description": "Convert unstructured text into structured JSON format",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "title": {"type": "string", "description": "Document title"},
-                            "sections": {"type": "array", "items": {"type": "string", "description": "Section headings"}},
-                            "Skills": {"type": "array", "items": {"type": "string", "description": "Key points"}},
-                            "experience": {"type": "array", "items": {"type": "string", "description": "Keywords"}},
-                            "summary": {"type": "string", "description": "Brief summary"}
-                        },
-                        "required": ["title", "sections", "key_points", "keywords", "summary"]
-                    }
-                }
-            }
-        ]
-
-        messages = [
-            {
-                "role": "system",
-                "content": """Convert unstructured text into structured JSON with:
-                - title
-                - sections (array)
-                - skills (array)
-                - experience (array)
-                - summary"""
-            },
-            {"role": "user", "content": extracted_text}
-        ]
-
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            tools=tools,
-            max_tokens=1000,
+        response = get_client().chat.completions.create(
+            model=MODEL,
+            messages=build_messages(extracted_text),
+            tools=TOOLS,
+            max_tokens=MAX_TOKENS,
             tool_choice="auto"
         )
-
-        if response and response.choices and response.choices[0].message.tool_calls:
-            structured_data = response.choices[0].message.tool_calls[0].function.arguments
-            return json.loads(structured_data)
-        else:
-            return {"error": f"Invalid response structure: {response}"}
+        return parse_tool_response(response)
 
     except Exception as e:
         return {"error": str(e)}
+
+
+def chunk_pages(text_by_page, token_budget=CHUNK_TOKEN_BUDGET):
+    """Group consecutive pages into chunks that fit the token budget.
+    Pages larger than the budget on their own are split."""
+    max_chars = token_budget * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    current_size = 0
+    for page in sorted(text_by_page):
+        page_text = text_by_page[page]
+        for start in range(0, len(page_text), max_chars):
+            piece = page_text[start : start + max_chars]
+            if current and current_size + len(piece) > max_chars:
+                chunks.append("\n\n".join(current))
+                current = []
+                current_size = 0
+            current.append(piece)
+            current_size += len(piece) + 2
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def merge_structured_data(parts):
+    """Reduce step: merge per-chunk results into one document of the same schema."""
+    merged = {}
+    for part in parts:
+        for key, value in part.items():
+            if isinstance(value, list):
+                items = merged.setdefault(key, [])
+                items.extend(item for item in value if item not in items)
+            elif value and not merged.get(key):
+                merged[key] = value
+    return merged
+
+
+def json_data_chunked(text_by_page, max_workers=MAX_CONCURRENT_REQUESTS):
+    """Structure a long document by page-aligned chunks, processed concurrently
+    and merged into the same schema as json_data.
+
+    If any chunk fails the whole call returns {"error": ...} rather than a merge
+    that silently leaves part of the document out; successful chunks stay cached,
+    so a retry only resends the failed ones."""
+    chunks = chunk_pages(text_by_page)
+    if len(chunks) <= 1:
+        return json_data(chunks[0] if chunks else "")
+
+    cache_keys = [_ai_cache_key(chunk) for chunk in chunks]
+    results = [_load_cached(cache_key) for cache_key in cache_keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        from components.openai_async import structure_texts  # httpx
+
+        # Uncached chunks go out together through the async layer
+        fresh = structure_texts(
+            [chunks[i] for i in missing],
+            st.secrets["OPENAI_API_KEY"],
+            max_concurrency=max_workers,
+        )
+        for i, result in zip(missing, fresh):
+            results[i] = result
+            _store_cached(cache_keys[i], result)
+
+    failed = [i for i, result in enumerate(results) if "error" in result]
+    if failed:
+        return {
+            "error": f"{len(failed)} of {len(chunks)} chunks failed "
+            f"(chunk {failed[0] + 1}: {results[failed[0]]['error']})",
+            "failed_chunks": [i + 1 for i in failed],
+        }
+
+    merged = merge_structured_data(results)
+    # Let the model write one title and summary from the chunk summaries
+    summaries = "\n\n".join(
+        f"Title: {part.get('title', '')}\nSummary: {part.get('summary', '')}"
+        for part in results
+    )
+    overall = json_data(summaries)
+    if "error" not in overall:
+        for key in ("title", "summary"):
+            if overall.get(key):
+                merged[key] = overall[key]
+    return merged
@@ -1,43 +1,121 @@
+import atexit
+import functools
 import json
-import re
-from io import BytesIO
+import os
+import tempfile
 
 import fitz
-import numpy as np
-import pandas as pd
 import streamlit as st
-from PIL import Image, ImageDraw
+from PIL import ImageDraw
 from streamlit.components.v1 import html
 
+from components.batch import display_batch_content
 from components.database import (
-    fetch_pdf_records,
+    fetch_pdf_records_page,
     get_user_subscription,
     get_user_upload_count,
     insert_pdf_record,
 )
-from components.openai_functions import json_data
+from components.document_pool import DocumentPool
+from components.export import EXPORT_FORMATS, export_pages, read_export
+from components.extraction import create_extraction_pool, join_pages, pool_is_broken
+from components.layout_export import LAYOUT_FORMATS, write_layout
+from components.lazy_extraction import LazyExtraction
+from components.prefetch import PagePrefetcher, next_prefetch_depth, prefetch_targets
+from components.raster_cache import RasterCache, render_page
+from components.spool import UploadSpool
+from components.text_cache import file_hash, load_document, store_text_by_page
+
+# Memory budget for rendered page images shared by all sessions.
+RASTER_CACHE_MAX_BYTES = (
+    int(os.environ.get("PDFX_RASTER_CACHE_MB", "256")) * 1024 * 1024
+)
+
+# How often the text panel refreshes to show progress while text is extracted in
+# the background (only the panel reruns, not the whole page).
+EXTRACTION_REFRESH_SECONDS = 0.5
+
+# Keep each document's text store zlib-compressed between reruns (less memory per
+# session, at the cost of a decompression whenever the text is read).
+COMPRESS_TEXT_STORE = os.environ.get("PDFX_COMPRESS_TEXT", "0") == "1"
+
+
+@st.cache_resource
+def _get_extraction_pool():
+    return create_extraction_pool()
+
+
+def get_extraction_pool():
+    """Process pool for parallel extraction, shared across reruns and sessions.
+
+    A pool whose worker died never accepts work again, so it is replaced here
+    instead of failing every later upload until the server restarts.
+    """
+    pool = _get_extraction_pool()
+    if pool_is_broken(pool):
+        _get_extraction_pool.clear()
+        pool.shutdown(wait=False, cancel_futures=True)
+        pool = _get_extraction_pool()
+    return pool
+
+
+@st.cache_resource
+def get_document_pool():
+    """Open fitz documents kept alive across reruns and shared by all sessions."""
+    pool = DocumentPool()
+    atexit.register(pool.close)
+    return pool
+
+
+@st.cache_resource
+def get_upload_spool():
+    """Managed directory of uploaded PDFs, opened by path."""
+    return UploadSpool()
+
 
+@st.cache_resource
+def get_raster_cache():
+    """Rendered page images shared by all sessions."""
+    return RasterCache(RASTER_CACHE_MAX_BYTES)
 
-def extract_text_from_pdf(doc):
-    """Extracts text from a PDF document and returns it as a string and a page-wise dictionary."""
-    full_text = ""
-    text_by_page = {}
 
-    for i, page in enumerate(doc):
-        page_text = page.get_text()
-        text_by_page[i + 1] = page_text
-        full_text += page_text + "\n\n"
+@st.cache_resource
+def get_word_index_cache():
+    """Per-page word box indexes used for rectangle selections."""
+    from components.layout_index import WordIndexCache  # numpy
 
-    return full_text, text_by_page
+    return WordIndexCache()
+
+
+@st.cache_resource
+def get_prefetcher():
+    """Background renderer that warms the raster cache around the viewed page."""
+    prefetcher = PagePrefetcher(get_raster_cache(), get_document_pool())
+    atexit.register(prefetcher.shutdown)
+    return prefetcher
 
 
 def create_highlighted_image(
-    page, highlighted_text=None, rect=None, zoom=2.5, selection=None
+    page,
+    highlighted_text=None,
+    rect=None,
+    zoom=2.5,
+    selection=None,
+    doc_key=None,
+    highlight_rects=None,
 ):
-    """Create an image of the PDF page with optional highlighted text or rect."""
-    mat = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=mat)
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    """Create an image of the PDF page with optional highlighted text or rect.
+
+    highlight_rects are extra (x0, y0, x1, y1) boxes in PDF space, such as the
+    search hits on this page.
+
+    When doc_key is given the page raster comes from the shared cache and only the
+    overlays are drawn, on a copy of the cached image.
+    """
+    if doc_key is None:
+        img = render_page(page, zoom)
+    else:
+        img = get_raster_cache().get_or_render(doc_key, page, zoom).copy()
     draw = ImageDraw.Draw(img)
 
     # Draw rectangle if provided
@@ -48,6 +126,14 @@ def create_highlighted_image(
         y1 = int(rect.y1 * zoom)
         draw.rectangle([x0, y0, x1, y1], outline="red", width=3)
 
+    # Outline other search hits on the page
+    for x0, y0, x1, y1 in highlight_rects or ():
+        draw.rectangle(
+            [int(x0 * zoom), int(y0 * zoom), int(x1 * zoom), int(y1 * zoom)],
+            outline="orange",
+            width=2,
+        )
+
     # Highlight text if provided
     if highlighted_text and highlighted_text.strip():
         text_instances = page.search_for(highlighted_text)
@@ -66,12 +152,22 @@ def create_highlighted_image(
     return img
 
 
-def find_text_position(doc, text, page_num=None):
-    """Find position of text in the document. Returns (page_num, rect)."""
+def find_text_position(doc, text, page_num=None, search_index=None):
+    """Find position of text in the document. Returns (page_num, rect).
+
+    Once search_index covers every page it is asked first (whole-word matches);
+    text it cannot match, such as a selection that starts or ends mid-word, and
+    any text while the index is incomplete, is found by scanning with search_for.
+    """
     if not text or text.strip() == "":
         return None, None
 
     text = text.strip()
+    if search_index is not None and len(search_index) == len(doc):
+        hits = search_index.search(text, page_num)
+        if hits:
+            return hits[0][0], fitz.Rect(hits[0][1])
+
     pages_to_search = [doc[page_num - 1]] if page_num else doc
 
     for i, page in enumerate(pages_to_search):
@@ -177,8 +273,15 @@ def get_selection_js(zoom_factor):
     """
 
 
-def handle_pdf_selection(doc, page_num, selection_coords, zoom):
-    """Convert image selection coordinates to PDF text selection."""
+def handle_pdf_selection(
+    doc, page_num, selection_coords, zoom, doc_key=None, search_index=None
+):
+    """Convert image selection coordinates to PDF text selection.
+
+    With a doc_key the words are looked up in the page's cached word index
+    instead of walking the text layout with get_textbox. The index is built from
+    the words search_index already holds for the page, if it has them.
+    """
     if not selection_coords or not all(selection_coords):
         return None, None
 
@@ -195,20 +298,67 @@ def handle_pdf_selection(doc, page_num, selection_coords, zoom):
     rect = fitz.Rect(pdf_x0, pdf_y0, pdf_x1, pdf_y1)
 
     # Get text within the selected rectangle
-    selected_text = page.get_textbox(rect)
+    if doc_key is None:
+        selected_text = page.get_textbox(rect)
+    else:
+        words = (
+            search_index.page_words.get(page_num) if search_index is not None else None
+        )
+        word_index = get_word_index_cache().get_or_build(doc_key, page, words)
+        selected_text = word_index.text_in(pdf_x0, pdf_y0, pdf_x1, pdf_y1)
 
     if selected_text.strip():
         return selected_text, rect
     return None, None
 
 
+def init_session_state():
+    """Give every session state variable of the extractor page its default."""
+    if "file_processed" not in st.session_state:
+        st.session_state.file_processed = False
+    if "current_file_name" not in st.session_state:
+        st.session_state.current_file_name = ""
+    if "current_file_id" not in st.session_state:
+        st.session_state.current_file_id = None
+    if "current_file_hash" not in st.session_state:
+        st.session_state.current_file_hash = ""
+    if "extraction" not in st.session_state:
+        st.session_state.extraction = None
+    if "export_file" not in st.session_state:
+        st.session_state.export_file = None
+        st.session_state.export_key = None
+    if "search_hits" not in st.session_state:
+        st.session_state.search_hits = []
+    if "search_hit" not in st.session_state:
+        st.session_state.search_hit = 0
+    if "structured_data" not in st.session_state:
+        st.session_state.structured_data = {}
+    if "current_page" not in st.session_state:
+        st.session_state.current_page = 1
+    if "highlight_text" not in st.session_state:
+        st.session_state.highlight_text = ""
+    if "highlight_rect" not in st.session_state:
+        st.session_state.highlight_rect = None
+    if "search_input" not in st.session_state:
+        st.session_state.search_input = ""
+    if "text_selection" not in st.session_state:
+        st.session_state.text_selection = ""
+    if "selection_data" not in st.session_state:
+        st.session_state.selection_data = None
+    if "selection_coords" not in st.session_state:
+        st.session_state.selection_coords = None
+    if "prefetch_state" not in st.session_state:
+        # (last viewed page, direction of travel, look-ahead depth)
+        st.session_state.prefetch_state = (1, 0, 1)
+
+
 def display_app_content():
     st.title("Interactive PDF Extractor")
     user_info = st.session_state.get("user_info", {})
     user_id = user_info.get("id", "no-user")
     st.write(f"Hello, {user_info.get('name', 'Guest')} (ID: {user_id})")
     subscription = get_user_subscription(user_id)
-    upload_count = get_user_upload_count(user_id)
+    upload_count = get_user_upload_count(user_id, subscription)
     uploads_remaining = subscription["upload_limit"] - upload_count
 
     st.sidebar.subheader("Your Subscription")
@@ -217,6 +367,11 @@ def display_app_content():
     st.sidebar.progress(upload_count / subscription["upload_limit"])
     st.sidebar.write("**Valid Until:**")
 
+    batch_mode = st.sidebar.toggle("Batch mode", help="Process many PDFs at once")
+    if batch_mode and uploads_remaining > 0:
+        display_batch_content(user_id, uploads_remaining, get_extraction_pool())
+        return
+
     col1, col2 = st.columns([3, 1])
 
     with col1:
@@ -230,89 +385,139 @@ def display_app_content():
     with col2:
         st.caption("Download Options")
         download_format = st.radio(
-            "Format:", ["TXT", "CSV", "AI JSON SUMMARY"], label_visibility="collapsed"
+            "Format:",
+            ["TXT", "CSV", "JSONL", "LAYOUT (PARQUET)", "AI JSON SUMMARY"],
+            label_visibility="collapsed",
         )
 
     if not uploaded_file:
         st.info("Please upload a PDF file to extract text.")
         st.stop()
 
-    # Initialize session state variables
-    if "file_processed" not in st.session_state:
-        st.session_state.file_processed = False
-    if "current_file_name" not in st.session_state:
-        st.session_state.current_file_name = ""
-    if "extracted_text" not in st.session_state:
-        st.session_state.extracted_text = ""
-    if "text_by_page" not in st.session_state:
-        st.session_state.text_by_page = {}
-    if "structured_data" not in st.session_state:
-        st.session_state.structured_data = {}
-    if "current_page" not in st.session_state:
-        st.session_state.current_page = 1
-    if "highlight_text" not in st.session_state:
-        st.session_state.highlight_text = ""
-    if "highlight_rect" not in st.session_state:
-        st.session_state.highlight_rect = None
-    if "search_input" not in st.session_state:
-        st.session_state.search_input = ""
-    if "text_selection" not in st.session_state:
-        st.session_state.text_selection = ""
-    if "selection_data" not in st.session_state:
-        st.session_state.selection_data = None
-    if "selection_coords" not in st.session_state:
-        st.session_state.selection_coords = None
-
-    # Check if this is a new file
-    if st.session_state.current_file_name != uploaded_file.name:
+    init_session_state()
+
+    # Hash the upload only when the uploader hands us a different file
+    if st.session_state.current_file_id != uploaded_file.file_id:
+        pdf_hash = file_hash(uploaded_file)
+        st.session_state.current_file_id = uploaded_file.file_id
+    else:
+        pdf_hash = st.session_state.current_file_hash
+
+    # Check if this is a new file; identity is the content, not the name
+    spool = get_upload_spool()
+    if st.session_state.current_file_hash != pdf_hash:
+        if st.session_state.current_file_hash:
+            spool.release(st.session_state.current_file_hash)
+        spool_path = spool.acquire(pdf_hash, uploaded_file)
         st.session_state.file_processed = False
         st.session_state.current_file_name = uploaded_file.name
-        st.session_state.extracted_text = ""
-        st.session_state.text_by_page = {}
+        st.session_state.current_file_hash = pdf_hash
+        if st.session_state.extraction is not None:
+            st.session_state.extraction.stop()
+        st.session_state.extraction = None
+        st.session_state.search_hits = []
+        st.session_state.search_hit = 0
         st.session_state.structured_data = {}
         st.session_state.current_page = 1
         st.session_state.highlight_text = ""
         st.session_state.highlight_rect = None
         st.session_state.selection_data = None
         st.session_state.selection_coords = None
+        st.session_state.prefetch_state = (1, 0, 1)
+    else:
+        spool_path = spool.touch(pdf_hash, uploaded_file)
+
+    # Open by path so MuPDF reads pages from the spooled file, not a bytes copy
+    def open_document():
+        return fitz.open(spool_path)
+
+    # Reuse an already parsed document instead of re-opening it on every rerun
+    with get_document_pool().lease(pdf_hash, open_document, uploaded_file.size) as doc:
+        display_document(
+            doc,
+            open_document,
+            spool_path,
+            uploaded_file,
+            pdf_hash,
+            user_id,
+            download_format,
+        )
+
 
-    # Process the PDF
-    pdf_bytes = uploaded_file.read()
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+def display_document(
+    doc, open_document, spool_path, uploaded_file, pdf_hash, user_id, download_format
+):
+    """Render the preview, text panel and downloads for an open document."""
     num_pages = len(doc)
 
-    if not st.session_state.file_processed:
+    if st.session_state.extraction is None:
         # Record the upload in database - ONLY ONCE
         insert_pdf_record(uploaded_file.name, "processed", user_id)
-        # Cache the extracted text
-        full_text, text_by_page = extract_text_from_pdf(doc)
-        st.session_state.extracted_text = full_text
-        st.session_state.text_by_page = text_by_page
-        st.session_state.file_processed = True
+        # Pages are extracted on demand; a background worker completes the rest
+        text_by_page, words_by_page = load_document(pdf_hash)
+        st.session_state.extraction = LazyExtraction(
+            spool_path,
+            num_pages,
+            get_extraction_pool(),
+            text_by_page=text_by_page,
+            on_complete=functools.partial(store_text_by_page, pdf_hash),
+            compress=COMPRESS_TEXT_STORE,
+            words_by_page=words_by_page,
+        )
+    extraction = st.session_state.extraction
+    search_index = extraction.search_index
+
+    if extraction.error:
+        st.error(f"Error extracting text: {extraction.error}")
+    # The text store (extraction.store) is the only full copy of the text
+    st.session_state.file_processed = extraction.text_complete
 
-    # Function to update highlight from text selection
+    # The page on screen always has its text, whatever the worker is doing
+    extraction.page_text(doc, st.session_state.current_page)
+
+    # The text widgets' callbacks run at the start of the next script run, before
+    # this document is leased again, so they only record the query. It is
+    # resolved here, on the handle this run holds.
     def update_highlight_from_text():
-        if st.session_state.text_selection and st.session_state.text_selection.strip():
-            selected_text = st.session_state.text_selection.strip()
-            page_num, rect = find_text_position(doc, selected_text)
-            if page_num:
-                st.session_state.current_page = page_num
-                st.session_state.highlight_text = selected_text
-                st.session_state.highlight_rect = rect
-                st.experimental_rerun()
-
-    # Function to update highlight from search
+        st.session_state.pending_query = ("text", st.session_state.text_selection)
+
     def update_highlight_from_search():
-        if st.session_state.search_input and st.session_state.search_input.strip():
-            search_text = st.session_state.search_input.strip()
-            page_num, rect = find_text_position(doc, search_text)
-            if page_num:
-                st.session_state.current_page = page_num
-                st.session_state.highlight_text = search_text
-                st.session_state.highlight_rect = rect
-                st.experimental_rerun()
-            else:
-                st.warning(f"Text '{search_text}' not found in the document.")
+        st.session_state.pending_query = ("search", st.session_state.search_input)
+
+    def resolve_query(kind, query):
+        query = (query or "").strip()
+        if not query:
+            return
+        if kind == "text":
+            page_num, rect = find_text_position(doc, query, search_index=search_index)
+        else:
+            if len(search_index) >= num_pages:
+                # Answer from the index: every hit, no page scanning
+                st.session_state.search_hits = search_index.search(query)
+                st.session_state.search_hit = 0
+                if st.session_state.search_hits:
+                    show_search_hit(0)
+                    return
+            # Not whole words (or not indexed yet): scan the pages with search_for
+            page_num, rect = find_text_position(doc, query)
+            if not page_num:
+                st.warning(f"Text '{query}' not found in the document.")
+        if page_num:
+            st.session_state.current_page = page_num
+            st.session_state.highlight_text = query
+            st.session_state.highlight_rect = rect
+
+    # Function to jump to one of the indexed search hits
+    def show_search_hit(hit):
+        page_num, bbox = st.session_state.search_hits[hit]
+        st.session_state.search_hit = hit
+        st.session_state.current_page = page_num
+        st.session_state.highlight_text = ""
+        st.session_state.highlight_rect = fitz.Rect(bbox)
+
+    pending_query = st.session_state.pop("pending_query", None)
+    if pending_query:
+        resolve_query(*pending_query)
 
     # Main content - Two-column layout
     pdf_col, text_col = st.columns([1, 1])
@@ -330,9 +535,39 @@ def display_app_content():
             rect=st.session_state.highlight_rect,
             zoom=2.0,
             selection=st.session_state.get("selection_coords"),
+            doc_key=pdf_hash,
+            highlight_rects=(
+                [
+                    bbox
+                    for page_num, bbox in st.session_state.search_hits
+                    if page_num == st.session_state.current_page
+                ]
+                if st.session_state.get("search_all_hits")
+                else None
+            ),
         )
         st.image(img, use_container_width=True)
 
+        # Render the pages the user is likely to flip to next in the background
+        last_page, direction, depth = st.session_state.prefetch_state
+        direction, depth = next_prefetch_depth(
+            last_page, st.session_state.current_page, direction, depth
+        )
+        st.session_state.prefetch_state = (
+            st.session_state.current_page,
+            direction,
+            depth,
+        )
+        get_prefetcher().schedule(
+            pdf_hash,
+            open_document,
+            uploaded_file.size,
+            prefetch_targets(
+                st.session_state.current_page, num_pages, direction, depth
+            ),
+            2.0,
+        )
+
         # Inject JavaScript for selection handling
         html(get_selection_js(2.0), height=0)
 
@@ -353,14 +588,19 @@ def display_app_content():
 
                 # Find text in the selection
                 selected_text, rect = handle_pdf_selection(
-                    doc, st.session_state.current_page, [x0, y0, x1, y1], 2.0
+                    doc,
+                    st.session_state.current_page,
+                    [x0, y0, x1, y1],
+                    2.0,
+                    doc_key=pdf_hash,
+                    search_index=search_index,
                 )
 
                 if selected_text:
                     st.session_state.highlight_text = selected_text
                     st.session_state.highlight_rect = rect
                     st.session_state.text_selection = selected_text
-                    st.experimental_rerun()
+                    st.rerun()
 
             except Exception as e:
                 st.error(f"Error processing selection: {e}")
@@ -381,7 +621,7 @@ def display_app_content():
                 st.session_state.highlight_rect = None
                 st.session_state.highlight_text = ""
                 st.session_state.selection_coords = None
-                st.experimental_rerun()
+                st.rerun()
         with cols[1]:
             if st.button(
                 "◀️ Prev",
@@ -394,7 +634,7 @@ def display_app_content():
                 st.session_state.highlight_rect = None
                 st.session_state.highlight_text = ""
                 st.session_state.selection_coords = None
-                st.experimental_rerun()
+                st.rerun()
         with cols[2]:
             st.markdown(
                 f"<div style='text-align:center; font-weight:bold;'>{st.session_state.current_page}/{num_pages}</div>",
@@ -412,7 +652,7 @@ def display_app_content():
                 st.session_state.highlight_rect = None
                 st.session_state.highlight_text = ""
                 st.session_state.selection_coords = None
-                st.experimental_rerun()
+                st.rerun()
         with cols[4]:
             if st.button(
                 "⏭️ Last",
@@ -423,29 +663,23 @@ def display_app_content():
                 st.session_state.highlight_rect = None
                 st.session_state.highlight_text = ""
                 st.session_state.selection_coords = None
-                st.experimental_rerun()
+                st.rerun()
 
     with text_col:
         st.subheader("Extracted Text")
 
-        # Page selector for text
-        page_options = ["All Pages"] + [f"Page {i+1}" for i in range(num_pages)]
-        selected_page = st.selectbox("Select page to view:", page_options)
-
-        # Text display based on selected page
-        if selected_page == "All Pages":
-            display_text = st.session_state.extracted_text
-        else:
-            page_num = int(selected_page.split(" ")[1])
-            display_text = st.session_state.text_by_page.get(page_num, "")
-
-        # Text area for displaying and selecting text
-        st.text_area(
-            "Select text to highlight in PDF:",
-            value=display_text,
-            height=400,
-            key="text_selection",
-            on_change=update_highlight_from_text,
+        # While the worker runs, only this panel refreshes to show its progress
+        extracting = not extraction.text_complete and not extraction.complete
+        st.fragment(
+            display_text_panel,
+            run_every=EXTRACTION_REFRESH_SECONDS if extracting else None,
+        )(
+            extraction,
+            extracting,
+            functools.partial(
+                get_document_pool().lease, pdf_hash, open_document, uploaded_file.size
+            ),
+            update_highlight_from_text,
         )
 
         # Search functionality
@@ -457,47 +691,112 @@ def display_app_content():
         )
         if st.button("Search"):
             update_highlight_from_search()
+            st.rerun()
+
+        search_hits = st.session_state.search_hits
+        if search_hits:
+            st.checkbox("Show all hits on the page", key="search_all_hits")
+            hit_cols = st.columns([1, 2, 1])
+            with hit_cols[0]:
+                if st.button(
+                    "◀️ Prev hit",
+                    use_container_width=True,
+                    disabled=st.session_state.search_hit == 0,
+                ):
+                    show_search_hit(st.session_state.search_hit - 1)
+                    st.rerun()
+            with hit_cols[1]:
+                st.markdown(
+                    f"<div style='text-align:center;'>Hit {st.session_state.search_hit + 1} of {len(search_hits)}</div>",
+                    unsafe_allow_html=True,
+                )
+            with hit_cols[2]:
+                if st.button(
+                    "Next hit ▶️",
+                    use_container_width=True,
+                    disabled=st.session_state.search_hit >= len(search_hits) - 1,
+                ):
+                    show_search_hit(st.session_state.search_hit + 1)
+                    st.rerun()
 
     # Download options
     st.markdown("---")
     st.subheader("Download Options")
 
-    if download_format == "TXT":
-        st.download_button(
-            "⬇️ Download as Text",
-            data=st.session_state.extracted_text,
-            file_name=f"{uploaded_file.name.split('.')[0]}.txt",
-            mime="text/plain",
-        )
-    elif download_format == "CSV":
-        # Creating a CSV with page number and text columns
-        csv_data = pd.DataFrame(
-            {
-                "Page": [
-                    f"Page {page}" for page in st.session_state.text_by_page.keys()
-                ],
-                "Text": list(st.session_state.text_by_page.values()),
-            }
-        ).to_csv(index=False)
+    if not st.session_state.file_processed and extraction.complete:
+        # The worker failed or stopped with pages missing
+        st.error("Downloads are unavailable because text extraction did not finish.")
+    elif not st.session_state.file_processed:
+        st.info("Text extraction is still running in the background.")
+        if st.button("Finish extraction and prepare downloads"):
+            with st.spinner("Extracting remaining pages..."):
+                extraction.wait()
+            st.rerun()
+    elif download_format in ("TXT", "CSV", "JSONL"):
+        fmt = download_format.lower()
+        compress = st.checkbox("Compress download (gzip)")
+        extension, mime = EXPORT_FORMATS[fmt]
+        # Written once per document and format, page by page; a new key replaces it
+        export_key = (pdf_hash, fmt, compress)
+        if st.session_state.export_key != export_key:
+            if st.session_state.export_file is not None:
+                st.session_state.export_file.close()
+            st.session_state.export_file = export_pages(
+                extraction.store.iter_pages(), fmt, compress
+            )
+            st.session_state.export_key = export_key
 
+        file_name = f"{uploaded_file.name.split('.')[0]}.{extension}"
         st.download_button(
-            "⬇️ Download as CSV",
-            data=csv_data,
-            file_name=f"{uploaded_file.name.split('.')[0]}.csv",
-            mime="text/csv",
+            f"⬇️ Download as {download_format}",
+            # Read only when the button is clicked, not on every rerun
+            data=functools.partial(read_export, st.session_state.export_file),
+            file_name=file_name + ".gz" if compress else file_name,
+            mime="application/gzip" if compress else mime,
         )
+    elif download_format == "LAYOUT (PARQUET)":
+        # Words with bounding boxes and fonts; read from the page objects on demand
+        export_key = (pdf_hash, "parquet")
+        if st.session_state.export_key != export_key and st.button(
+            "Prepare layout export"
+        ):
+            export_file = tempfile.TemporaryFile()
+            try:
+                with st.spinner("Collecting words, bounding boxes and fonts..."):
+                    write_layout(doc, export_file, "parquet")
+            except ImportError:
+                export_file.close()
+                st.error("The layout export needs pyarrow: pip install pyarrow")
+            else:
+                if st.session_state.export_file is not None:
+                    st.session_state.export_file.close()
+                st.session_state.export_file = export_file
+                st.session_state.export_key = export_key
+
+        if st.session_state.export_key == export_key:
+            extension, mime = LAYOUT_FORMATS["parquet"]
+            st.download_button(
+                "⬇️ Download layout as Parquet",
+                data=functools.partial(read_export, st.session_state.export_file),
+                file_name=f"{uploaded_file.name.split('.')[0]}_layout.{extension}",
+                mime=mime,
+            )
     elif download_format == "AI JSON SUMMARY":
         # Use cached AI processing results if available
         if not st.session_state.structured_data:
+            from components.openai_functions import json_data_chunked  # openai
+
             with st.spinner("🤖 Structuring content..."):
-                st.session_state.structured_data = json_data(
-                    st.session_state.extracted_text
-                )
+                st.session_state.structured_data = json_data_chunked(extraction.store)
 
         structured_data = st.session_state.structured_data
 
         if "error" in structured_data:
             st.error(f"AI Processing Failed: {structured_data['error']}")
+            if st.button("🔁 Retry AI processing"):
+                # Chunks that succeeded are cached; only the failed ones are resent
+                st.session_state.structured_data = {}
+                st.rerun()
         else:
             st.success("✅ Content Restructured Successfully!")
             # Display structured JSON
@@ -516,6 +815,118 @@ def display_app_content():
     # Upload history
     records = st.checkbox("I would like to see my upload history?")
     if records:
-        st.header("Your Upload History")
-        records = fetch_pdf_records(user_id)
-        st.dataframe(records if records else "No records found.")
+        display_upload_history(user_id)
+
+
+def display_text_panel(extraction, extracting, lease_document, on_text_change):
+    """Extraction progress and the text of one or all pages.
+
+    Runs as a fragment, refreshed on its own while extracting was set when the
+    page was drawn; lease_document() leases the document for pages that have no
+    text yet. The whole page is rerun once the text is complete (or the worker
+    gave up) and when the text area asks for a highlight.
+    """
+    if "pending_query" in st.session_state or (
+        extracting and (extraction.text_complete or extraction.complete)
+    ):
+        st.rerun()
+
+    num_pages = extraction.num_pages
+    if not extraction.text_complete:
+        if extraction.ocr_progress:
+            ocr_done, ocr_total = extraction.ocr_progress
+            st.progress(
+                ocr_done / ocr_total,
+                text=f"Running OCR on scanned pages... {ocr_done}/{ocr_total}",
+            )
+        else:
+            pages_done = extraction.pages_done
+            st.progress(
+                pages_done / num_pages,
+                text=f"Extracting text... {pages_done}/{num_pages} pages",
+            )
+    elif extraction.ocr_missing:
+        st.warning(
+            "Some pages are scanned images without a text layer. Install "
+            "pytesseract and Tesseract to extract their text with OCR."
+        )
+
+    # Page selector for text; pages still being extracted are marked as such
+    page_options = ["All Pages"] + [f"Page {i+1}" for i in range(num_pages)]
+    selected_page = st.selectbox(
+        "Select page to view:",
+        page_options,
+        format_func=lambda option: (
+            option
+            if option == "All Pages" or extraction.has_page(int(option.split(" ")[1]))
+            else f"{option} (extracting...)"
+        ),
+    )
+
+    # Text display based on selected page
+    if selected_page == "All Pages":
+        display_text = (
+            extraction.store.text()
+            if extraction.text_complete
+            else join_pages(extraction.snapshot())
+        )
+    else:
+        page_num = int(selected_page.split(" ")[1])
+        if extraction.has_page(page_num):
+            display_text = extraction.page_text(None, page_num)
+        else:
+            with lease_document() as doc:
+                display_text = extraction.page_text(doc, page_num)
+
+    # Text area for displaying and selecting text
+    st.text_area(
+        "Select text to highlight in PDF:",
+        value=display_text,
+        height=400,
+        key="text_selection",
+        on_change=on_text_change,
+    )
+
+
+def display_upload_history(user_id):
+    """Upload history table, loaded a page at a time with server-side filters."""
+    st.header("Your Upload History")
+    filter_cols = st.columns([2, 2])
+    with filter_cols[0]:
+        filename_filter = st.text_input("Filter by file name:", key="history_filename")
+    with filter_cols[1]:
+        date_range = st.date_input("Uploaded between:", value=(), key="history_dates")
+    start_date = date_range[0] if len(date_range) > 0 else None
+    end_date = date_range[1] if len(date_range) > 1 else None
+
+    # Start over whenever the filters change
+    history_filters = (filename_filter.strip(), start_date, end_date)
+    if st.session_state.get("history_filters") != history_filters:
+        st.session_state.history_filters = history_filters
+        st.session_state.history_rows = []
+        st.session_state.history_cursor = None
+        st.session_state.history_done = False
+
+    if not st.session_state.history_rows and not st.session_state.history_done:
+        load_history_page(user_id)
+
+    rows = st.session_state.history_rows
+    st.dataframe(rows if rows else "No records found.")
+    if not st.session_state.history_done and st.button("Load more"):
+        load_history_page(user_id)
+        st.rerun()
+
+
+def load_history_page(user_id):
+    """Append the next page of upload history to session state."""
+    filename_filter, start_date, end_date = st.session_state.history_filters
+    rows, cursor = fetch_pdf_records_page(
+        user_id,
+        cursor=st.session_state.history_cursor,
+        filename=filename_filter,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    st.session_state.history_rows = st.session_state.history_rows + rows
+    st.session_state.history_cursor = cursor
+    st.session_state.history_done = cursor is None
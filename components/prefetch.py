@@ -0,0 +1,76 @@
+# components/prefetch.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Pages rendered ahead in the direction of travel once the user keeps paging
+# the same way.
+MAX_PREFETCH_DEPTH = 4
+
+
+def next_prefetch_depth(previous_page, current_page, direction, depth):
+    """Adapt the look-ahead to how the user navigates. Returns (direction, depth).
+
+    Repeated single steps the same way widen the look-ahead; jumps and
+    direction changes fall back to the immediate neighbours.
+    """
+    step = current_page - previous_page
+    if step == 0:
+        return direction, depth
+    if abs(step) == 1 and step == direction:
+        return direction, min(depth + 1, MAX_PREFETCH_DEPTH)
+    return (1 if step > 0 else -1) if abs(step) == 1 else 0, 1
+
+
+def prefetch_targets(current_page, num_pages, direction=0, depth=1):
+    """Pages (1-based) worth rendering while the user reads current_page."""
+    targets = [current_page + 1, current_page - 1]
+    if direction:
+        targets += [current_page + direction * i for i in range(2, depth + 1)]
+    targets += [1, num_pages]
+    seen = {current_page}
+    pages = []
+    for page in targets:
+        if 1 <= page <= num_pages and page not in seen:
+            seen.add(page)
+            pages.append(page)
+    return pages
+
+
+class PagePrefetcher:
+    """Renders pages into the raster cache on a background thread pool."""
+
+    def __init__(self, raster_cache, document_pool, max_workers=2):
+        self.raster_cache = raster_cache
+        self.document_pool = document_pool
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="page-prefetch"
+        )
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    def schedule(self, doc_key, open_document, size, pages, zoom):
+        """Queue rendering of the given 1-based pages that are not cached yet."""
+        todo = []
+        with self._lock:
+            for page in pages:
+                key = (doc_key, page - 1, zoom)
+                if key not in self._pending and key not in self.raster_cache:
+                    self._pending.add(key)
+                    todo.append(key)
+        if todo:
+            self._executor.submit(self._render, doc_key, open_document, size, todo)
+
+    def _render(self, doc_key, open_document, size, keys):
+        try:
+            # Lease a handle of our own: fitz documents are not shared between threads
+            with self.document_pool.lease(doc_key, open_document, size) as doc:
+                for key in keys:
+                    _, page_index, zoom = key
+                    if page_index < len(doc):
+                        self.raster_cache.get_or_render(doc_key, doc[page_index], zoom)
+        finally:
+            with self._lock:
+                self._pending.difference_update(keys)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -88,7 +88,7 @@ def packages():
 
     current_subscription = get_user_subscription(user_id)
     current_plan = current_subscription.get("plan", "free")
-    upload_count = get_user_upload_count(user_id)
+    upload_count = get_user_upload_count(user_id, current_subscription)
 
     if "show_confirm_downgrade" not in st.session_state:
         st.session_state.show_confirm_downgrade = False
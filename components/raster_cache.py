@@ -0,0 +1,59 @@
+# components/raster_cache.py
+import threading
+from collections import OrderedDict
+
+import fitz
+from PIL import Image
+
+
+def render_page(page, zoom):
+    """Rasterize a page at the given zoom into a PIL RGB image."""
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+
+class RasterCache:
+    """Byte-budgeted LRU of rendered page images keyed by (doc_key, page_index, zoom).
+
+    Cached images are shared and must not be drawn on; callers copy them first.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._images = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            img = self._images.get(key)
+            if img is not None:
+                self._images.move_to_end(key)
+            return img
+
+    def put(self, key, img):
+        size = img.width * img.height * len(img.getbands())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._images.pop(key, None)
+            if old is not None:
+                self._bytes -= old.width * old.height * len(old.getbands())
+            self._images[key] = img
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._bytes -= evicted.width * evicted.height * len(evicted.getbands())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._images
+
+    def get_or_render(self, doc_key, page, zoom):
+        """Return the cached raster of page, rendering and caching it on a miss."""
+        key = (doc_key, page.number, zoom)
+        img = self.get(key)
+        if img is None:
+            img = render_page(page, zoom)
+            self.put(key, img)
+        return img
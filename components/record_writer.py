@@ -0,0 +1,230 @@
+# components/record_writer.py
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: no journal locking, only our own journal is replayed
+    fcntl = None
+
+
+def _try_lock(f):
+    """Take an exclusive lock on an open file without waiting."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _is_linked(f, path):
+    """Whether path still names the open file f (it was not removed and replaced)."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    own = os.fstat(f.fileno())
+    return (st.st_dev, st.st_ino) == (own.st_dev, own.st_ino)
+
+
+def _read_rows(f):
+    rows = []
+    for line in f:
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            continue  # torn last line after a crash
+    return rows
+
+
+class RecordWriter:
+    """Write-behind queue that sends rows to the database in batched inserts.
+
+    Rows are appended to a local journal file before they are queued, so rows
+    that were not yet sent when the process stops are sent by the next writer.
+    Every process journals to its own file (journal_path with the PID added) and
+    holds a lock on it while it runs; a new writer takes over the journals of
+    writers that are gone, which it can tell by their lock being free. Delivery
+    is at-least-once: a crash between an insert and the journal truncation can
+    send a batch twice.
+
+    Failed inserts are retried until they succeed, unless is_permanent(error)
+    says the rows themselves were rejected (a constraint, a policy, a bad
+    value). The batch is then split until the rejected rows are found; they are
+    appended to the dead-letter file (journal_path with "-dead-letter" added)
+    instead of blocking every row queued after them.
+    """
+
+    def __init__(
+        self,
+        insert_batch,
+        journal_path,
+        max_batch=100,
+        flush_interval=2.0,
+        is_permanent=None,
+    ):
+        self.insert_batch = insert_batch
+        self.journal_path = journal_path
+        root, ext = os.path.splitext(journal_path)
+        self.dead_letter_path = f"{root}-dead-letter{ext}"
+        self.is_permanent = is_permanent or (lambda error: False)
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._queue = []
+        self._in_flight = []
+        self._stopped = False
+        os.makedirs(os.path.dirname(journal_path) or ".", exist_ok=True)
+        self._journal = open(f"{root}.{os.getpid()}{ext}", "a+", encoding="utf-8")
+        _try_lock(self._journal)  # nobody else has a reason to hold it
+        self._journal.seek(0)
+        self._queue.extend(_read_rows(self._journal))
+        self._adopt_orphaned_journals()
+        self._thread = threading.Thread(
+            target=self._run, name="record-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _adopt_orphaned_journals(self):
+        """Move the rows of journals whose writer is gone into ours and queue them."""
+        if fcntl is None:
+            return
+        root, ext = os.path.splitext(self.journal_path)
+        # Per-process journals, plus the shared one older versions wrote
+        paths = glob.glob(f"{glob.escape(root)}.*{ext}") + [self.journal_path]
+        orphans = []
+        rows = []
+        for path in paths:
+            name = os.path.basename(path)
+            pid = name[len(os.path.basename(root)) + 1 : len(name) - len(ext)]
+            if path == self._journal.name or (
+                path != self.journal_path and not pid.isdigit()
+            ):
+                continue
+            try:
+                f = open(path, encoding="utf-8")
+            except FileNotFoundError:
+                continue
+            # Locked: its writer is alive. Unlinked: another writer adopted it first.
+            if not _try_lock(f) or not _is_linked(f, path):
+                f.close()
+                continue
+            orphans.append(f)
+            rows.extend(_read_rows(f))
+        if rows:
+            for row in rows:
+                self._journal.write(json.dumps(row) + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._queue.extend(rows)
+        # Only now that the rows are safe in our journal
+        for f in orphans:
+            os.remove(f.name)
+            f.close()
+
+    def put(self, rows):
+        """Queue rows for insertion. Returns once they are in the journal."""
+        with self._cond:
+            for row in rows:
+                self._journal.write(json.dumps(row) + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._queue.extend(rows)
+            if len(self._queue) >= self.max_batch:
+                self._cond.notify()
+
+    def pending(self, predicate=None):
+        """Rows queued or being sent, optionally filtered."""
+        with self._cond:
+            rows = self._in_flight + self._queue
+        return [row for row in rows if predicate is None or predicate(row)]
+
+    def flush(self):
+        """Send everything queued now. Rows stay queued if an insert fails for a
+        reason that is not permanent; that error is raised."""
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    if not self._queue:
+                        # Everything is in the database; start a fresh journal
+                        self._journal.truncate(0)
+                        self._journal.seek(0)
+                        return
+                    batch = self._queue[: self.max_batch]
+                    del self._queue[: self.max_batch]
+                    self._in_flight = list(batch)
+                try:
+                    self._send(batch)
+                except Exception:
+                    with self._cond:
+                        # Only what was not inserted or dead-lettered yet
+                        self._queue[:0] = self._in_flight
+                        self._in_flight = []
+                    raise
+
+    def _send(self, batch):
+        """Insert batch, setting rejected rows aside. Rows are settled in order, and
+        each settled part is dropped from the front of _in_flight."""
+        parts = [batch]
+        while parts:
+            part = parts.pop()
+            try:
+                self.insert_batch(part)
+            except Exception as e:
+                if not self.is_permanent(e):
+                    raise
+                if len(part) > 1:
+                    # Bisect to find the rejected rows; the first half goes next
+                    middle = len(part) // 2
+                    parts += [part[middle:], part[:middle]]
+                    continue
+                self._dead_letter(part[0], e)
+            with self._cond:
+                del self._in_flight[: len(part)]
+
+    def _dead_letter(self, row, error):
+        record = {"row": row, "error": str(error), "failed_at": time.time()}
+        # One append per line, so writers in other processes don't interleave
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _run(self):
+        retry_delay = self.flush_interval
+        while True:
+            with self._cond:
+                if not self._stopped and len(self._queue) < self.max_batch:
+                    self._cond.wait(self.flush_interval)
+                stopped = self._stopped
+            try:
+                self.flush()
+                retry_delay = self.flush_interval
+            except Exception:
+                # Database slow or down: rows stay in the journal, back off and retry
+                time.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60)
+            if stopped:
+                return
+
+    def close(self):
+        """Flush on shutdown; anything not sent stays in the journal for next time."""
+        with self._cond:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join(timeout=10)
+        with self._cond:
+            if not self._queue and not self._in_flight:
+                # Everything was sent; don't leave an empty journal per process behind
+                os.remove(self._journal.name)
+            self._journal.close()
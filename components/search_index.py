@@ -0,0 +1,87 @@
+# components/search_index.py
+import string
+from collections import defaultdict
+
+_STRIP_CHARS = string.punctuation + "“”‘’"
+
+
+def normalize_term(word):
+    """Index form of a word: lower-cased, surrounding punctuation removed."""
+    return word.strip(_STRIP_CHARS).lower()
+
+
+class SearchIndex:
+    """Positional inverted index over the words of a document.
+
+    Maps each term to (page, word position) postings and keeps the words (with
+    their boxes) per page, so phrase queries are answered without touching the
+    PDF. Matching is case-insensitive on whole words.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(list)
+        self.page_terms = {}
+        self.page_words = {}
+
+    def add_page(self, page_no, words, replace=False):
+        """Index a page from the output of page.get_text("words").
+
+        A page already indexed is kept unless replace is set (used when OCR
+        supplies the words of a page whose text layer was empty).
+        """
+        if page_no in self.page_terms:
+            if not replace:
+                return
+            for term in set(self.page_terms[page_no]):
+                postings = self.postings.get(term)
+                if postings:
+                    postings[:] = [p for p in postings if p[0] != page_no]
+        terms = []
+        for position, word in enumerate(words):
+            term = normalize_term(word[4])
+            terms.append(term)
+            if term:
+                self.postings[term].append((page_no, position))
+        self.page_terms[page_no] = terms
+        self.page_words[page_no] = [tuple(word) for word in words]
+
+    def is_indexed(self, page_no):
+        return page_no in self.page_terms
+
+    def __len__(self):
+        return len(self.page_terms)
+
+    def words_by_page(self):
+        """The indexed words per page, in get_text("words") form (for the cache)."""
+        return dict(self.page_words)
+
+    def search(self, text, page_no=None):
+        """Return every occurrence of text as (page_no, (x0, y0, x1, y1)), in reading order."""
+        query = [term for term in (normalize_term(w) for w in text.split()) if term]
+        if not query:
+            return []
+
+        hits = []
+        for page, position in self.postings.get(query[0], ()):
+            if page_no is not None and page != page_no:
+                continue
+            terms = self.page_terms[page]
+            end = position + len(query)
+            if terms[position:end] != query:
+                continue
+            words = self.page_words[page][position:end]
+            hits.append(
+                (
+                    page,
+                    position,
+                    (
+                        min(word[0] for word in words),
+                        min(word[1] for word in words),
+                        max(word[2] for word in words),
+                        max(word[3] for word in words),
+                    ),
+                )
+            )
+        # Pages can be indexed out of order when extraction runs in parallel
+        hits.sort()
+        return [(page, bbox) for page, _, bbox in hits]
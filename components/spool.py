@@ -0,0 +1,106 @@
+# components/spool.py
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+SPOOL_DIR = os.environ.get(
+    "PDFX_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "pdf_text_extractor_spool")
+)
+# Unreferenced files are removed after this long; referenced ones after SESSION_TIMEOUT,
+# because Streamlit does not tell us when a session goes away.
+UNUSED_GRACE_SECONDS = 300
+SESSION_TIMEOUT_SECONDS = 6 * 3600
+SWEEP_INTERVAL_SECONDS = 60
+
+
+class UploadSpool:
+    """Uploaded PDFs written once to a managed directory, named by content hash.
+
+    Documents are then opened by path, so MuPDF reads pages from the file (and the
+    page cache) instead of from a private bytes copy. Files are reference-counted
+    by the sessions viewing them and removed by a periodic sweep.
+    """
+
+    def __init__(self, root=SPOOL_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        # hash -> [refcount, last_used]
+        self._refs = {}
+        self._last_sweep = 0.0
+        os.makedirs(root, exist_ok=True)
+
+    def path_for(self, pdf_hash):
+        return os.path.join(self.root, f"{pdf_hash}.pdf")
+
+    def acquire(self, pdf_hash, fileobj):
+        """Spool fileobj (once per hash) and take a reference. Returns its path."""
+        with self._lock:
+            refs = self._refs.setdefault(pdf_hash, [0, 0.0])
+            refs[0] += 1
+            refs[1] = time.monotonic()
+        path = self._write(pdf_hash, fileobj)
+        self.sweep()
+        return path
+
+    def touch(self, pdf_hash, fileobj):
+        """Mark a referenced file as in use, re-spooling it if it was swept."""
+        with self._lock:
+            if pdf_hash in self._refs:
+                self._refs[pdf_hash][1] = time.monotonic()
+        return self._write(pdf_hash, fileobj)
+
+    def _write(self, pdf_hash, fileobj):
+        path = self.path_for(pdf_hash)
+        if not os.path.exists(path):
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+            with os.fdopen(fd, "wb") as f:
+                fileobj.seek(0)
+                shutil.copyfileobj(fileobj, f, 1024 * 1024)
+            os.replace(tmp_path, path)
+        return path
+
+    def release(self, pdf_hash):
+        with self._lock:
+            refs = self._refs.get(pdf_hash)
+            if refs:
+                refs[0] = max(0, refs[0] - 1)
+                refs[1] = time.monotonic()
+
+    def sweep(self, force=False):
+        """Delete spooled files nobody has used recently, including leftovers from
+        earlier processes."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_sweep < SWEEP_INTERVAL_SECONDS:
+                return
+            self._last_sweep = now
+            refs = {pdf_hash: tuple(entry) for pdf_hash, entry in self._refs.items()}
+
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            pdf_hash = name[: -len(".pdf")] if name.endswith(".pdf") else None
+            if pdf_hash in refs:
+                count, last_used = refs[pdf_hash]
+                timeout = SESSION_TIMEOUT_SECONDS if count else UNUSED_GRACE_SECONDS
+                expired = now - last_used > timeout
+            else:
+                # Not ours (previous process) or a torn .part file
+                try:
+                    expired = (
+                        time.time() - os.path.getmtime(path) > UNUSED_GRACE_SECONDS
+                    )
+                except OSError:
+                    continue
+            if not expired:
+                continue
+            try:
+                # Handles still open on the file keep working on POSIX
+                os.remove(path)
+            except OSError:
+                continue
+            with self._lock:
+                entry = self._refs.get(pdf_hash)
+                if entry is not None and tuple(entry) == refs.get(pdf_hash):
+                    del self._refs[pdf_hash]
@@ -0,0 +1,80 @@
+# components/text_cache.py
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import zlib
+
+from components.disk_cache import CACHE_DIR, DiskCache
+
+# Bump whenever extraction output changes so stale cache entries are ignored.
+EXTRACTOR_VERSION = "3"
+
+TEXT_CACHE_MAX_BYTES = int(os.environ.get("PDFX_TEXT_CACHE_MB", "512")) * 1024 * 1024
+
+
+def document_hash(pdf_bytes):
+    """SHA-256 hex digest identifying a PDF by its content."""
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def file_hash(fileobj, chunk_size=1024 * 1024):
+    """document_hash of a file object, read in chunks instead of as one bytes copy."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def get_text_cache():
+    """Process-wide extraction cache, created on first use."""
+    return DiskCache(
+        os.path.join(CACHE_DIR, "text_cache.sqlite3"), TEXT_CACHE_MAX_BYTES
+    )
+
+
+def _cache_key(pdf_hash):
+    return f"{pdf_hash}:{EXTRACTOR_VERSION}"
+
+
+def load_document(pdf_hash):
+    """Return the cached (text_by_page, words_by_page) for a document hash.
+
+    words_by_page holds the get_text("words") rows the search index is built
+    from, or is None when only the text was cached. Both are None on a miss.
+    """
+    try:
+        value = get_text_cache().get(_cache_key(pdf_hash))
+    except sqlite3.Error:
+        # A broken cache must never block extraction
+        return None, None
+    if value is None:
+        return None, None
+    entry = json.loads(zlib.decompress(value))
+    text_by_page = {int(page): text for page, text in entry["text"].items()}
+    words_by_page = entry.get("words")
+    if words_by_page is not None:
+        words_by_page = {int(page): words for page, words in words_by_page.items()}
+    return text_by_page, words_by_page
+
+
+def load_text_by_page(pdf_hash):
+    """Return the cached text_by_page for a document hash, or None on a miss."""
+    return load_document(pdf_hash)[0]
+
+
+def store_text_by_page(pdf_hash, text_by_page, words_by_page=None):
+    """Cache the extraction output of a document, and its words if given."""
+    # dict() so a PageTextStore can be stored as well
+    entry = {"text": dict(text_by_page)}
+    if words_by_page is not None:
+        entry["words"] = words_by_page
+    value = zlib.compress(json.dumps(entry).encode("utf-8"))
+    try:
+        get_text_cache().set(_cache_key(pdf_hash), value)
+    except sqlite3.Error:
+        pass
@@ -0,0 +1,128 @@
+# components/text_store.py
+import zlib
+from array import array
+from collections.abc import Mapping
+
+PAGE_SEPARATOR = b"\n\n"
+
+
+class PageTextStore(Mapping):
+    """Read-only text of a whole document in one UTF-8 buffer.
+
+    Pages are laid out back to back, each followed by a blank line, exactly as
+    join_pages() would join them, so the buffer itself is the "All Pages" text.
+    offsets[i] is where page i + 1 starts; offsets[-1] is the buffer length.
+
+    The store is a Mapping of page number (1-based) to str, so it can go
+    wherever a text_by_page dict is read. page_view() and view() return
+    memoryviews into the buffer without copying it. With compress=True the
+    buffer is kept zlib-compressed and every access decompresses it.
+
+    Pages that had no text when the store was built are listed in missing. They
+    are blank in the buffer but left out of the Mapping, and iter_pages()
+    refuses a partial store unless asked for one.
+    """
+
+    def __init__(self, buffer, offsets, compressed=False, missing=()):
+        self._buffer = buffer
+        self._offsets = offsets
+        self.compressed = compressed
+        self.missing = frozenset(missing)
+
+    @classmethod
+    def from_pages(cls, text_by_page, num_pages=None, compress=False):
+        """Build a store from a text_by_page mapping, recording absent pages."""
+        if num_pages is None:
+            num_pages = max(text_by_page, default=0)
+        offsets = array("Q", [0])
+        parts = []
+        missing = []
+        for page_no in range(1, num_pages + 1):
+            if page_no not in text_by_page:
+                missing.append(page_no)
+            data = text_by_page.get(page_no, "").encode("utf-8")
+            parts.append(data)
+            parts.append(PAGE_SEPARATOR)
+            offsets.append(offsets[-1] + len(data) + len(PAGE_SEPARATOR))
+        buffer = b"".join(parts)
+        if compress:
+            buffer = zlib.compress(buffer)
+        return cls(buffer, offsets, compressed=compress, missing=missing)
+
+    def _data(self):
+        if self.compressed:
+            return zlib.decompress(self._buffer)
+        return self._buffer
+
+    @property
+    def num_pages(self):
+        """Pages the store was built for, including missing ones."""
+        return len(self._offsets) - 1
+
+    @property
+    def complete(self):
+        """Every page has its text."""
+        return not self.missing
+
+    def __len__(self):
+        return self.num_pages - len(self.missing)
+
+    def __iter__(self):
+        return (
+            page_no
+            for page_no in range(1, self.num_pages + 1)
+            if page_no not in self.missing
+        )
+
+    def __contains__(self, page_no):
+        return (
+            isinstance(page_no, int)
+            and 1 <= page_no <= self.num_pages
+            and page_no not in self.missing
+        )
+
+    def __getitem__(self, page_no):
+        if page_no not in self:
+            raise KeyError(page_no)
+        return str(self.page_view(page_no), "utf-8")
+
+    def iter_pages(self, partial=False):
+        """Yield (page_no, text) in page order, decompressing only once.
+
+        Raises ValueError for a store with missing pages, unless partial is set;
+        then only the pages that have text are yielded.
+        """
+        if self.missing and not partial:
+            raise ValueError(
+                f"{len(self.missing)} of {self.num_pages} pages have no text "
+                f"(first missing: page {min(self.missing)})"
+            )
+        data = memoryview(self._data())
+        for page_no in self:
+            yield page_no, str(self._slice(data, page_no), "utf-8")
+
+    def _slice(self, data, page_no):
+        start = self._offsets[page_no - 1]
+        end = self._offsets[page_no] - len(PAGE_SEPARATOR)
+        return data[start:end]
+
+    def page_view(self, page_no):
+        """UTF-8 bytes of one page as a memoryview into the buffer."""
+        return self._slice(memoryview(self._data()), page_no)
+
+    def view(self):
+        """UTF-8 bytes of all pages as a memoryview into the buffer."""
+        return memoryview(self._data())
+
+    def data(self):
+        """UTF-8 bytes of all pages (the buffer itself unless compressed)."""
+        return self._data()
+
+    def text(self):
+        """All pages as one string, as returned by join_pages()."""
+        return str(self._data(), "utf-8")
+
+    @property
+    def nbytes(self):
+        """Memory held by the buffer and offsets."""
+        return len(self._buffer) + self._offsets.itemsize * len(self._offsets)
@@ -0,0 +1,266 @@
+"""Headless batch extraction.
+
+Walks directories or glob patterns of PDFs, extracts them across a process pool
+and writes one TXT, CSV or JSONL file per PDF:
+
+    python extract_cli.py archive/ "scans/**/*.pdf" --out extracted --format jsonl
+
+--format parquet (or arrow) writes word-level layout instead: one row per word
+with its page/block/line position, bounding box, font and size (needs pyarrow).
+
+Outputs mirror each PDF's path relative to the input it was found under.
+Completed inputs are logged to <out>/.progress.jsonl together with the output
+options; running the same command again skips them, so an interrupted backfill
+resumes where it stopped. A PDF that crashes its worker process twice is logged
+there as failed, so a resumed run does not stop on it again.
+"""
+
+import argparse
+import collections
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from components.export import open_export, write_pages
+from components.extraction import create_extraction_pool, extract_file, iter_bounded
+from components.layout_export import LAYOUT_FORMATS, export_layout_file
+from components.ocr import extract_file_with_ocr
+
+PROGRESS_FILE = ".progress.jsonl"
+
+
+def input_root(item):
+    """Directory an input's matches are mirrored relative to: the directory itself,
+    the part of a glob pattern before its first wildcard, or a file's directory."""
+    if os.path.isdir(item):
+        return item
+    parts = []
+    for part in os.path.dirname(item).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or os.curdir
+
+
+def find_pdfs(inputs):
+    """Expand directories (recursively) and glob patterns into a sorted list of
+    (path, path relative to its input root) pairs."""
+    paths = {}
+    for item in inputs:
+        root = input_root(item)
+        if os.path.isdir(item):
+            found = (
+                os.path.join(dirpath, name)
+                for dirpath, _, files in os.walk(item)
+                for name in files
+                if name.lower().endswith(".pdf")
+            )
+        else:
+            found = (
+                path for path in glob.glob(item, recursive=True) if os.path.isfile(path)
+            )
+        for path in found:
+            paths.setdefault(path, os.path.relpath(path, root))
+    return sorted(paths.items())
+
+
+def output_path(relative, out_dir, fmt, compress=False):
+    """Mirror a PDF's path relative to its input root under out_dir, with the
+    export extension."""
+    path = os.path.join(out_dir, os.path.splitext(relative)[0] + "." + fmt)
+    return path + ".gz" if compress else path
+
+
+def write_output(path, pdf_path, text_by_page, fmt, compress=False):
+    """Write one document page by page to a temp file, then move it into place."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".part"
+    pages = ((page, text_by_page[page]) for page in sorted(text_by_page))
+    with open_export(tmp_path, compress) as f:
+        write_pages(f, pages, fmt, source=pdf_path if fmt == "jsonl" else None)
+    os.replace(tmp_path, path)
+
+
+def progress_options(args):
+    """Output options a progress entry was written with; a file only counts as done
+    for a run with the same ones."""
+    return {"format": args.format, "gzip": args.gzip, "ocr": args.ocr}
+
+
+def load_progress(out_dir, options):
+    """Input paths already completed by a previous run with the same options."""
+    done = set()
+    try:
+        with open(os.path.join(out_dir, PROGRESS_FILE), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    if all(entry[name] == value for name, value in options.items()):
+                        done.add(entry["path"])
+                except (ValueError, KeyError):
+                    continue  # torn last line after a crash, or an older entry
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def iter_surviving_crashes(worker, jobs, max_workers, max_in_flight):
+    """Run worker(*args) for each (key, args) in jobs through a process pool, like
+    iter_bounded, but survive workers that die (a MuPDF crash, or the OOM killer
+    on one corrupt PDF). Yields (key, future) as jobs finish.
+
+    A dead worker breaks the whole pool, and every job in it fails with it. The
+    pool is replaced and the jobs that were in flight are retried one at a time,
+    so the one responsible is found: a job that kills its worker again on its own
+    is yielded with future None.
+    """
+    jobs = iter(jobs)
+    suspects = collections.deque()
+    pool = create_extraction_pool(max_workers)
+    try:
+        while True:
+            isolated = bool(suspects)
+            batch = [suspects.popleft()] if isolated else jobs
+            submitted = {}
+
+            def track(items):
+                for key, args in items:
+                    submitted[key] = args
+                    yield key, args
+
+            try:
+                for key, future in iter_bounded(
+                    pool, worker, track(batch), 1 if isolated else max_in_flight
+                ):
+                    if isinstance(future.exception(), BrokenProcessPool):
+                        raise future.exception()
+                    del submitted[key]
+                    yield key, future
+            except BrokenProcessPool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = create_extraction_pool(max_workers)
+                if isolated:
+                    (key,) = submitted
+                    yield key, None
+                else:
+                    suspects.extend(submitted.items())
+                continue
+            if not isolated:
+                return
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract text from PDFs in bulk.")
+    parser.add_argument("inputs", nargs="+", help="PDF directories or glob patterns")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument(
+        "--format",
+        choices=["txt", "csv", "jsonl", *LAYOUT_FORMATS],
+        default="txt",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="gzip each text output file (adds .gz); layout formats compress columns",
+    )
+    parser.add_argument(
+        "--ocr",
+        action="store_true",
+        help="OCR pages without a text layer (needs pytesseract and Tesseract)",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore progress from earlier runs"
+    )
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    options = progress_options(args)
+    done = set() if args.restart else load_progress(args.out, options)
+    pdfs = {}
+    outputs = set()
+    for path, relative in find_pdfs(args.inputs):
+        if relative in outputs:
+            # Two inputs would write the same output file
+            print(f"SKIPPED {path}: output clashes with another input", file=sys.stderr)
+            continue
+        outputs.add(relative)
+        if path not in done:
+            pdfs[path] = relative
+    print(
+        f"{len(pdfs)} PDFs to extract ({len(done)} already done)",
+        file=sys.stderr,
+    )
+
+    started = time.monotonic()
+    pages = size = ok = failed = 0
+    with open(os.path.join(args.out, PROGRESS_FILE), "a", encoding="utf-8") as progress:
+
+        def log_progress(path, **entry):
+            progress.write(json.dumps({"path": path, **options, **entry}))
+            progress.write("\n")
+            progress.flush()
+
+        layout = args.format in LAYOUT_FORMATS
+        if layout:
+            # Workers write layout files themselves; only page counts come back
+            worker = export_layout_file
+            jobs = (
+                (
+                    path,
+                    (path, output_path(relative, args.out, args.format), args.format),
+                )
+                for path, relative in pdfs.items()
+            )
+        else:
+            worker = extract_file_with_ocr if args.ocr else extract_file
+            jobs = ((path, (path,)) for path in pdfs)
+        # Keep a couple of files queued per worker so none of them idles
+        for path, future in iter_surviving_crashes(
+            worker, jobs, args.workers, args.workers * 2
+        ):
+            if future is None:
+                # Logged as done so a resumed run does not crash on it again
+                failed += 1
+                print(f"FAILED {path}: worker crashed on it twice", file=sys.stderr)
+                log_progress(path, error="worker crashed")
+                continue
+            try:
+                if layout:
+                    num_pages = future.result()
+                else:
+                    text_by_page = future.result()
+                    write_output(
+                        output_path(pdfs[path], args.out, args.format, args.gzip),
+                        path,
+                        text_by_page,
+                        args.format,
+                        args.gzip,
+                    )
+                    num_pages = len(text_by_page)
+            except Exception as e:
+                failed += 1
+                print(f"FAILED {path}: {e}", file=sys.stderr)
+                continue
+            ok += 1
+            pages += num_pages
+            size += os.path.getsize(path)
+            log_progress(path, pages=num_pages)
+
+    elapsed = max(time.monotonic() - started, 1e-9)
+    print(
+        f"{ok} files ({failed} failed), {pages} pages, {size / 1e6:.1f} MB "
+        f"in {elapsed:.1f}s: {pages / elapsed:.1f} pages/s, "
+        f"{size / 1e6 / elapsed:.2f} MB/s",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
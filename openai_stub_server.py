@@ -0,0 +1,122 @@
+"""Local stand-in for the OpenAI chat completions endpoint.
+
+Answers POST /v1/chat/completions with a tool-call response shaped like the
+real API, after an artificial delay, and can inject 429/500 errors so retry
+and throughput behaviour can be measured offline:
+
+    python openai_stub_server.py --port 8765 --latency 0.5 --jitter 0.2 --error-rate 0.1
+"""
+
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_response(request):
+    """A chat completion whose single tool call echoes a little of the input."""
+    text = request["messages"][-1]["content"]
+    arguments = {
+        "title": text.splitlines()[0][:80] if text else "",
+        "sections": [],
+        "Skills": [],
+        "experience": [],
+        "summary": text[:200],
+    }
+    return {
+        "id": f"chatcmpl-stub-{random.getrandbits(32):08x}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "stub"),
+        "choices": [
+            {
+                "index": 0,
+                "finish_reason": "tool_calls",
+                "message": {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [
+                        {
+                            "id": "call_stub",
+                            "type": "function",
+                            "function": {
+                                "name": "structure_pdf_content",
+                                "arguments": json.dumps(arguments),
+                            },
+                        }
+                    ],
+                },
+            }
+        ],
+        "usage": {
+            "prompt_tokens": len(text) // 4,
+            "completion_tokens": 50,
+            "total_tokens": len(text) // 4 + 50,
+        },
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    options = None
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send(404, {"error": {"message": "not found"}})
+            return
+
+        options = self.options
+        time.sleep(max(0.0, random.gauss(options.latency, options.jitter)))
+        roll = random.random()
+        if roll < options.error_rate / 2:
+            self._send(
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                {"retry-after": "1"},
+            )
+        elif roll < options.error_rate:
+            self._send(500, {"error": {"message": "Injected server error"}})
+        else:
+            self._send(200, make_response(json.loads(body)))
+
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.options.verbose:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="latency std-dev")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="0..1")
+    parser.add_argument("--verbose", action="store_true")
+    StubHandler.options = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        (StubHandler.options.host, StubHandler.options.port), StubHandler
+    )
+    print(
+        f"Stub OpenAI server on http://{server.server_address[0]}:{server.server_port}/v1"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+-- Upload counts and the history page filter pdf_records by user and order or
+-- range on created_at; this index serves both without scanning the table.
+create index if not exists pdf_records_user_id_created_at_idx
+    on public.pdf_records (user_id, created_at desc);
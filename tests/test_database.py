@@ -0,0 +1,26 @@
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+
+from components.database import _is_permanent_insert_error
+
+
+@pytest.mark.parametrize(
+    "error, permanent",
+    [
+        (APIError({"code": "23505", "message": "duplicate key"}), True),
+        (APIError({"code": "42501", "message": "row-level security"}), True),
+        (APIError({"code": "22P02", "message": "invalid uuid"}), True),
+        (APIError({"code": "PGRST204", "message": "unknown column"}), True),
+        (APIError({"code": 400, "message": "JSON could not be generated"}), True),
+        (APIError({"code": "40P01", "message": "deadlock detected"}), False),
+        (APIError({"code": "57014", "message": "statement timeout"}), False),
+        (APIError({"code": "PGRST002", "message": "schema cache"}), False),
+        (APIError({"code": "PGRST301", "message": "JWT expired"}), False),
+        (APIError({"code": 503, "message": "JSON could not be generated"}), False),
+        (APIError({"code": 429, "message": "JSON could not be generated"}), False),
+        (httpx.ConnectTimeout("timed out"), False),
+    ],
+)
+def test_is_permanent_insert_error(error, permanent):
+    assert _is_permanent_insert_error(error) is permanent
@@ -0,0 +1,34 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from components.export import export_pages, read_export
+from components.text_store import PageTextStore
+
+PAGES = {1: "first page\nwith two lines", 2: "", 3: 'quotes " and, commas'}
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_export_formats(compress):
+    store = PageTextStore.from_pages(PAGES)
+
+    def read(fmt):
+        data = export_pages(store.iter_pages(), fmt, compress).read()
+        return (gzip.decompress(data) if compress else data).decode("utf-8")
+
+    assert read("txt") == store.text()
+    rows = list(csv.reader(io.StringIO(read("csv"), newline="")))
+    assert rows == [["Page", "Text"]] + [[f"Page {n}", t] for n, t in PAGES.items()]
+    records = [json.loads(line) for line in read("jsonl").splitlines()]
+    assert records == [{"page": n, "text": t} for n, t in PAGES.items()]
+
+
+def test_export_spills_to_disk():
+    pages = ((n, "x" * 1000) for n in range(1, 101))
+    export_file = export_pages(pages, "txt", max_memory=10_000)
+    assert len(read_export(export_file)) == 100 * 1002
+    # Read again from the start, as each click of the download button does
+    assert len(read_export(export_file)) == 100 * 1002
@@ -0,0 +1,24 @@
+import tempfile
+
+import fitz
+import pytest
+
+from components.layout_export import write_layout
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def make_doc():
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "hello layout")
+    doc.new_page().insert_text((72, 72), "second page")
+    return doc
+
+
+def test_write_layout_rows():
+    with tempfile.TemporaryFile() as export_file:
+        assert write_layout(make_doc(), export_file, "parquet") == 4
+        export_file.seek(0)
+        table = pq.read_table(export_file)
+    assert table.column("page").to_pylist() == [1, 1, 2, 2]
+    assert table.column("text").to_pylist() == ["hello", "layout", "second", "page"]
@@ -0,0 +1,21 @@
+import fitz
+
+from components.layout_index import WordIndexCache
+from components.search_index import SearchIndex
+
+
+def test_cached_page_is_rebuilt_when_ocr_replaces_its_words():
+    with fitz.open() as doc:
+        page = doc.new_page()
+        search_index = SearchIndex()
+        search_index.add_page(1, [])
+        cache = WordIndexCache()
+        words = search_index.page_words.get(1)
+        assert cache.get_or_build("doc", page, words).text_in(0, 0, 200, 200) == ""
+
+        search_index.add_page(1, [(10, 10, 50, 20, "scanned", 0, 0, 0)], replace=True)
+        words = search_index.page_words.get(1)
+        assert cache.get_or_build("doc", page, words).text_in(0, 0, 200, 200) == (
+            "scanned"
+        )
+        assert cache.get_or_build("doc", page, words) is cache.get_or_build("doc", page)
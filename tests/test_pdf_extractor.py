@@ -0,0 +1,115 @@
+import threading
+
+import fitz
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import components.pdf_extractor as pdf_extractor
+from components.lazy_extraction import LazyExtraction
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "report.pdf"
+    with fitz.open() as doc:
+        for n in range(1, 4):
+            doc.new_page().insert_text((72, 72), f"page {n} of the report")
+        doc.save(path)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    """No database, no text cache and no process pool."""
+    monkeypatch.setattr(pdf_extractor, "insert_pdf_record", lambda *args: None)
+    monkeypatch.setattr(pdf_extractor, "load_document", lambda pdf_hash: (None, None))
+    monkeypatch.setattr(pdf_extractor, "store_text_by_page", lambda *args: None)
+    monkeypatch.setattr(pdf_extractor, "get_extraction_pool", lambda: None)
+
+
+def _document_app(pdf_path, download_format):
+    import os
+
+    import fitz
+
+    from components.pdf_extractor import display_document, init_session_state
+
+    class Upload:
+        name = os.path.basename(pdf_path)
+        size = os.path.getsize(pdf_path)
+
+    init_session_state()
+    with fitz.open(pdf_path) as doc:
+        display_document(
+            doc,
+            lambda: fitz.open(pdf_path),
+            pdf_path,
+            Upload(),
+            pdf_path,  # content hash; unique per test
+            "user",
+            download_format,
+        )
+
+
+def run_document_app(pdf_path, download_format="TXT"):
+    return AppTest.from_function(
+        _document_app, args=(pdf_path, download_format), default_timeout=10
+    ).run()
+
+
+def test_progress_while_extracting(pdf_path, monkeypatch):
+    gate = threading.Event()
+
+    class GatedExtraction(LazyExtraction):
+        def _run(self):
+            gate.wait(10)
+            super()._run()
+
+    monkeypatch.setattr(pdf_extractor, "LazyExtraction", GatedExtraction)
+    app = run_document_app(pdf_path)
+    assert not app.exception
+    assert "Text extraction is still running in the background." in [
+        info.value for info in app.info
+    ]
+    assert app.get("progress")
+    # The page on screen is extracted right away, the others by the worker
+    assert app.selectbox[0].options[1:] == [
+        "Page 1",
+        "Page 2 (extracting...)",
+        "Page 3 (extracting...)",
+    ]
+
+    gate.set()
+    app.session_state.extraction.wait(10)
+    app.run()
+    assert not app.exception
+    assert not app.info
+    assert not app.get("progress")
+    assert app.selectbox[0].options[1:] == ["Page 1", "Page 2", "Page 3"]
+
+
+@pytest.mark.parametrize("download_format", ["TXT", "CSV", "JSONL"])
+def test_text_download(pdf_path, download_format):
+    app = run_document_app(pdf_path, download_format)
+    app.session_state.extraction.wait(10)
+    app.run()
+    assert not app.exception
+    (button,) = app.get("download_button")
+    assert button.proto.label == f"⬇️ Download as {download_format}"
+    # The export is written once, not on every rerun
+    export_file = app.session_state.export_file
+    app.run()
+    assert app.session_state.export_file is export_file
+
+
+def test_layout_download(pdf_path):
+    pytest.importorskip("pyarrow")
+    app = run_document_app(pdf_path, "LAYOUT (PARQUET)")
+    app.session_state.extraction.wait(10)
+    app.run()
+    assert not app.get("download_button")
+    (prepare,) = [b for b in app.button if b.label == "Prepare layout export"]
+    prepare.click().run()
+    assert not app.exception
+    (button,) = app.get("download_button")
+    assert button.proto.label == "⬇️ Download layout as Parquet"
@@ -0,0 +1,136 @@
+import fcntl
+import json
+import os
+
+import pytest
+
+from components.record_writer import RecordWriter
+
+
+class Rejected(Exception):
+    """Stands in for a constraint or policy violation."""
+
+
+class Database:
+    def __init__(self, down=0):
+        self.rows = []
+        self.down = down
+
+    def insert(self, rows):
+        if self.down:
+            self.down -= 1
+            raise ConnectionError("database unreachable")
+        if any(row.get("bad") for row in rows):
+            raise Rejected("violates check constraint")
+        self.rows.extend(rows)
+
+
+def make_writer(tmp_path, database, flush_interval=0.01, **kwargs):
+    return RecordWriter(
+        database.insert,
+        str(tmp_path / "pending.jsonl"),
+        flush_interval=flush_interval,
+        is_permanent=lambda error: isinstance(error, Rejected),
+        **kwargs,
+    )
+
+
+def rows(*ids):
+    return [{"id": i} for i in ids]
+
+
+def write_journal(path, journal_rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in journal_rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def test_rows_are_sent_and_journal_removed(tmp_path):
+    database = Database()
+    writer = make_writer(tmp_path, database)
+    writer.put(rows(1, 2))
+    writer.close()
+    assert database.rows == rows(1, 2)
+    assert os.listdir(tmp_path) == []
+
+
+def test_unsent_rows_are_replayed_by_next_writer(tmp_path):
+    writer = make_writer(tmp_path, Database(down=10**6))
+    writer.put(rows(1, 2))
+    writer.close()
+    assert os.listdir(tmp_path) == [f"pending.{os.getpid()}.jsonl"]
+
+    database = Database()
+    make_writer(tmp_path, database).close()
+    assert database.rows == rows(1, 2)
+
+
+def test_orphaned_journals_are_adopted(tmp_path):
+    write_journal(tmp_path / "pending.999999.jsonl", rows(1))
+    # The shared journal written by older versions
+    write_journal(tmp_path / "pending.jsonl", rows(2))
+    database = Database()
+    make_writer(tmp_path, database).close()
+    assert sorted(row["id"] for row in database.rows) == [1, 2]
+    assert os.listdir(tmp_path) == []
+
+
+def test_journal_of_live_writer_is_left_alone(tmp_path):
+    live = tmp_path / "pending.999999.jsonl"
+    write_journal(live, rows(1))
+    with open(live, encoding="utf-8") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        database = Database()
+        make_writer(tmp_path, database).close()
+    assert database.rows == []
+    assert live.exists()
+
+
+def test_rejected_rows_are_dead_lettered(tmp_path):
+    database = Database()
+    writer = make_writer(tmp_path, database, flush_interval=60, max_batch=10)
+    writer.put(rows(1, 2) + [{"id": 3, "bad": True}] + rows(4, 5))
+    writer.flush()
+    assert database.rows == rows(1, 2, 4, 5)
+    assert writer.pending() == []
+    with open(writer.dead_letter_path, encoding="utf-8") as f:
+        (record,) = [json.loads(line) for line in f]
+    assert record["row"] == {"id": 3, "bad": True}
+    assert "check constraint" in record["error"]
+    writer.close()
+
+
+def test_transient_errors_keep_rows_queued(tmp_path):
+    database = Database(down=10**6)
+    writer = make_writer(tmp_path, database, flush_interval=60)
+    writer.put(rows(1))
+    with pytest.raises(ConnectionError):
+        writer.flush()
+    assert writer.pending() == rows(1)
+    assert not os.path.exists(writer.dead_letter_path)
+    database.down = 0
+    writer.flush()
+    assert database.rows == rows(1)
+    writer.close()
+
+
+def test_failure_after_rejection_requeues_only_unsettled_rows(tmp_path):
+    database = Database()
+    writer = make_writer(tmp_path, database, flush_interval=60, max_batch=10)
+    inserted = database.insert
+    outages = [1]
+
+    def insert(batch):
+        # The database goes down once, right after the bad row has been isolated
+        if batch == rows(3) and outages:
+            database.down = outages.pop()
+        inserted(batch)
+
+    writer.insert_batch = insert
+    writer.put(rows(1) + [{"id": 2, "bad": True}] + rows(3))
+    with pytest.raises(ConnectionError):
+        writer.flush()
+    assert writer.pending() == rows(3)
+    writer.flush()
+    assert database.rows == rows(1, 3)
+    writer.close()
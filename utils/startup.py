@@ -0,0 +1,87 @@
+# utils/startup.py
+"""Import-time profiling for app startup.
+
+Set PDFX_IMPORT_PROFILE=1 to have app.py log which imports its startup paid for.
+To check the cost of importing modules in a fresh interpreter (e.g. in CI):
+
+    python -m utils.startup streamlit components.pdf_extractor --max-ms 1500
+"""
+
+import argparse
+import builtins
+import os
+import sys
+import time
+
+_original_import = builtins.__import__
+_timings = {}
+_started = None
+_logged = False
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        # Cumulative: includes everything the module imported in turn
+        _timings.setdefault(name, time.perf_counter() - start)
+
+
+def enable_import_profile(force=False):
+    """Start timing first-time imports if PDFX_IMPORT_PROFILE is set (or force)."""
+    global _started
+    if _started is not None or not (force or os.environ.get("PDFX_IMPORT_PROFILE")):
+        return
+    _started = time.perf_counter()
+    builtins.__import__ = _timed_import
+
+
+def import_profile_report(limit=15):
+    """The slowest top-level imports so far as text, or None when profiling is off."""
+    if _started is None:
+        return None
+    elapsed = time.perf_counter() - _started
+    top_level = {
+        name: seconds
+        for name, seconds in _timings.items()
+        if name.split(".")[0] == name or name.startswith("components.")
+    }
+    lines = [f"Startup: {elapsed * 1000:.0f} ms since profiling began"]
+    for name, seconds in sorted(top_level.items(), key=lambda item: -item[1])[:limit]:
+        lines.append(f"{seconds * 1000:8.1f} ms  {name}")
+    return "\n".join(lines)
+
+
+def log_import_profile():
+    """Print the report to stderr once per process (Streamlit reruns app.py)."""
+    global _logged
+    report = import_profile_report()
+    if report and not _logged:
+        _logged = True
+        print(report, file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time of modules.")
+    parser.add_argument("modules", nargs="+")
+    parser.add_argument("--limit", type=int, default=15)
+    parser.add_argument(
+        "--max-ms", type=float, help="exit with status 1 if the total exceeds this"
+    )
+    args = parser.parse_args(argv)
+
+    enable_import_profile(force=True)
+    start = time.perf_counter()
+    for module in args.modules:
+        __import__(module)
+    total_ms = (time.perf_counter() - start) * 1000
+    print(import_profile_report(args.limit))
+    print(f"Total: {total_ms:.0f} ms")
+    return 1 if args.max_ms is not None and total_ms > args.max_ms else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())